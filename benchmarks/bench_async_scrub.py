@@ -0,0 +1,58 @@
+# benchmarks/bench_async_scrub.py
+"""Wall-clock time of a MongoDB scrub step run sequentially vs. fanned out over collections.
+
+Seeds a scratch database on MONGO_DB_CONNECTION_STRING (dropped afterwards), then times
+normalize_collection_weeks over every collection at each concurrency level.
+
+Run from the repo root: python -m benchmarks.bench_async_scrub [--collections 32] [--concurrency 1,4,8,16]
+"""
+import argparse
+import contextlib
+import io
+import time
+from modules.connection_module import get_mongo_client, release_mongo_client
+from functions.async_scrub import run_over_collections
+from functions.normalize_week_fields import normalize_collection_weeks
+
+def seed(db, collections, seasons, games):
+    for c in range(collections):
+        collection = db[f"Team_{c}"]
+        collection.drop()
+        collection.insert_many([
+            {
+                "parameters": {"season": str(2010 + s), "team": str(c)},
+                "games": [
+                    {"game": {"id": c * 100000 + s * 1000 + g, "stage": "Regular Season", "week": str(g % 17 + 1)}}
+                    for g in range(games)
+                ],
+            }
+            for s in range(seasons)
+        ])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs. async MongoDB scrub fan-out")
+    parser.add_argument("--database", default="nfl_games_bench")
+    parser.add_argument("--collections", type=int, default=32)
+    parser.add_argument("--seasons", type=int, default=14)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,4,8,16")
+    args = parser.parse_args()
+
+    client = get_mongo_client()
+    db = client[args.database]
+    try:
+        for concurrency in [int(level) for level in args.concurrency.split(",")]:
+            seed(db, args.collections, args.seasons, args.games)
+            names = db.list_collection_names()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                run_over_collections(names, lambda name: normalize_collection_weeks(db[name]), concurrency)
+            elapsed = time.perf_counter() - start
+            mode = "sync" if concurrency <= 1 else "async"
+            print(f"{mode:<6} concurrency={concurrency:<3} {len(names)} collections  {elapsed:8.2f} s")
+    finally:
+        client.drop_database(args.database)
+        release_mongo_client(client)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_columnar.py
+"""Python vs columnar (pandas) engine for the team ID pass on a synthetic multi-season dataset.
+
+Run from the repo root: python -m benchmarks.bench_columnar [--seasons N] [--games N] [--repeat N]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import random
+import time
+from functions.assign_team_ids_and_update_json import assign_team_ids
+from functions.columnar import assign_team_ids_columnar
+
+STAGES = ["Pre Season", "Regular Season", "Post Season"]
+
+def synthetic_seasons(seasons, games, teams):
+    rng = random.Random(42)
+    names = list(teams) + ["Unknown Team"]
+    data = {}
+    for season in range(2024 - seasons, 2024):
+        season_games = []
+        for _ in range(games):
+            home, visitor = rng.sample(names, 2)
+            game = {
+                "stage": rng.choice(STAGES),
+                "home_team": home,
+                "visitor_team": visitor,
+                "points": rng.choice([str(rng.randint(0, 45)), ""]),
+                "points_opp": str(rng.randint(0, 45)),
+            }
+            if game["stage"] != "Pre Season":
+                game["winner"], game["loser"] = home, visitor
+            season_games.append(game)
+        data[str(season)] = season_games
+    return data
+
+def run_python(seasons, teams):
+    for season, games_data in seasons.items():
+        assign_team_ids(games_data, season, teams)
+
+def bench(name, run, seasons, teams, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        data = copy.deepcopy(seasons)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # Both engines print skipped games
+            run(data, teams)
+        best = min(best, time.perf_counter() - start)
+        result = data
+    rows = sum(len(games) for games in seasons.values())
+    print(f"{name:<10} {rows:>8} games  {best * 1000:8.1f} ms  {rows / best:10.0f} games/sec")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the python and columnar team ID engines")
+    parser.add_argument("--seasons", type=int, default=50)
+    parser.add_argument("--games", type=int, default=330)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    teams = {f"Team {i}": i + 1 for i in range(32)}
+    seasons = synthetic_seasons(args.seasons, args.games, teams)
+    expected = bench("python", run_python, seasons, teams, args.repeat)
+    actual = bench("columnar", assign_team_ids_columnar, seasons, teams, args.repeat)
+    print("✅ Outputs match." if actual == expected else "❌ Outputs differ!")
+
+if __name__ == "__main__":
+    main()
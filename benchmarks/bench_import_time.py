@@ -0,0 +1,67 @@
+# benchmarks/bench_import_time.py
+"""Import cost of each main.py action, measured with `python -X importtime` in a fresh interpreter.
+
+Every action's loader is called (which does its imports) but the action itself isn't run, so no
+MongoDB or network is needed. Exits non-zero when an action imports a package it shouldn't or
+goes over --budget-ms, so it can guard against import-time regressions.
+
+Run from the repo root: python -m benchmarks.bench_import_time [--repeat N] [--budget-ms MS] [--action NAME]
+"""
+import argparse
+import subprocess
+import sys
+from main import ACTIONS
+
+HEAVY_PACKAGES = ("selenium", "bs4", "requests", "pymongo", "pandas", "pyarrow", "tqdm")
+# Only the download actions should pay for the scraping stack
+SCRAPER_PACKAGES = ("selenium", "bs4", "requests")
+DOWNLOAD_ACTIONS = ("download", "download_preseason", "download_all")
+
+def import_times(code):
+    """Run `code` under -X importtime. Returns (total self time in ms, {top-level package: self ms summed over its modules})."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total_us, packages = 0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        top = name.strip().split(".")[0]
+        packages[top] = packages.get(top, 0) + int(self_us) / 1000
+    return total_us / 1000, packages
+
+def measure(code, repeat):
+    """Best total of `repeat` runs, with the package times from that run."""
+    return min((import_times(code) for _ in range(repeat)), key=lambda result: result[0])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of every main.py action")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, help="Fail when any action's imports take longer than this")
+    parser.add_argument("--action", action="append", choices=list(ACTIONS), help="Only measure these actions")
+    args = parser.parse_args()
+
+    failures = []
+    baseline, _ = measure("import main", args.repeat)
+    print(f"{'action':<20}{'ms':>9}  heavy packages (ms)")
+    print(f"{'(import main)':<20}{baseline:>9.1f}")
+    for action in args.action or ACTIONS:
+        total, packages = measure(f"import main; main.ACTIONS[{action!r}]()", args.repeat)
+        heavy = ", ".join(f"{name} {packages[name]:.0f}" for name in HEAVY_PACKAGES if name in packages)
+        print(f"{action:<20}{total:>9.1f}  {heavy or '-'}")
+        if action not in DOWNLOAD_ACTIONS:
+            leaked = [name for name in SCRAPER_PACKAGES if name in packages]
+            if leaked:
+                failures.append(f"{action} imports {', '.join(leaked)}")
+        if args.budget_ms is not None and total > args.budget_ms:
+            failures.append(f"{action} took {total:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if failures:
+        print("❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("✅ No import regressions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_parsers.py
+"""Rows/sec for the pro-football-reference table parsers on the saved fixture pages in tests/fixtures.
+
+"before" is the old per-field row.find() lookup (two tree searches per field), "after" the
+single pass over each row's cells that parse_regular_season_data/parse_preseason_data use now.
+
+Run from the repo root: python -m benchmarks.bench_parsers [--repeat N]
+"""
+import argparse
+import os
+import time
+from bs4 import BeautifulSoup
+from functions.web_scraper import parse_regular_season_data, parse_preseason_data, REGULAR_SEASON_FIELDS, PRESEASON_FIELDS
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures")
+
+def load_soup(name, parser):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return BeautifulSoup(f.read(), parser)
+
+def find_rows(soup, table_id, field_spec):
+    """The old extraction: row.find() for the week and then twice per field (existence check, then read)."""
+    data = []
+    for row in soup.find('table', {'id': table_id}).find_all('tr', {'data-row': True}):
+        week_num = row.find('th', {'data-stat': 'week_num'})
+        if week_num is None:
+            continue
+        game = {"week_num": week_num.text.strip()}
+        for field, stat in field_spec.items():
+            game[field] = row.find('td', {'data-stat': stat}).text.strip() if row.find('td', {'data-stat': stat}) else None
+        data.append(game)
+    return data
+
+def bench(name, parse, soup, repeat):
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(parse(soup))
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<36} {rows:>6} rows  {best * 1000:8.1f} ms  {rows / best:10.0f} rows/sec")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the season table parsers on the fixture pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for tree in ("lxml", "html.parser"):
+        regular_soup = load_soup("games.htm", tree)
+        preseason_soup = load_soup("preseason.htm", tree)
+        bench(f"regular season before [{tree}]", lambda soup: find_rows(soup, 'games', REGULAR_SEASON_FIELDS), regular_soup, args.repeat)
+        bench(f"regular season after  [{tree}]", parse_regular_season_data, regular_soup, args.repeat)
+        bench(f"preseason before [{tree}]", lambda soup: find_rows(soup, 'preseason', PRESEASON_FIELDS), preseason_soup, args.repeat)
+        bench(f"preseason after  [{tree}]", lambda soup: parse_preseason_data(soup, 2023), preseason_soup, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,60 @@
 # functions/__init__.py
+# Names load from their submodule on first use, so importing one step doesn't import every other step's dependencies
+from modules.lazy_exports import lazy_exports
 
-from .data_check import check_missing_data_by_year
-from .web_scraper import download_pfc_data, download_preseason_data
-
-from .game_utils import is_duplicate, correct_date_format, stage_check, rename_week_num, convert_preseason_date, find_game_by_date, update_game_stage_and_week
-
-from .assign_team_ids_and_update_json import assign_team_ids_and_update_json
-from .fetch_game_ids import fetch_game_ids_and_update_json
-from .update_stage_week_and_date import update_stage_week_and_date
-from .mongo_bleach import mongo_bleach
-from .normalize_week_fields import normalize_week_fields
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'data_check': ['check_missing_data_by_year', 'check_missing_data_for_collections'],
+    'web_scraper': ['download_pfc_data', 'download_preseason_data'],
+    'game_utils': ['is_duplicate', 'game_key', 'merge_games', 'game_fingerprint', 'correct_date_format', 'stage_check', 'rename_week_num', 'convert_preseason_date', 'find_game_by_date', 'GameUpdateQueue', 'update_game_stage_and_week', 'build_season_index', 'get_season_index', 'write_error_log'],
+    'assign_team_ids_and_update_json': ['assign_team_ids_and_update_json'],
+    'fetch_game_ids': ['fetch_game_ids_and_update_json'],
+    'update_stage_week_and_date': ['update_stage_week_and_date'],
+    'mongo_bleach': ['mongo_bleach'],
+    'normalize_week_fields': ['normalize_week_fields'],
+    'pipeline': ['run_pipeline'],
+    'columnar': ['assign_team_ids_columnar'],
+    'export_parquet': ['export_parquet'],
+    'indexes': ['ensure_indexes', 'report_query_plans'],
+    'game_store': ['run_game_store', 'migrate_game_store', 'sync_team_collections', 'team_games'],
+    'async_scrub': ['update_stage_week_and_date_async', 'mongo_bleach_async', 'normalize_week_fields_async'],
+})
 
 __all__ = [
     'check_missing_data_by_year',
+    'check_missing_data_for_collections',
     'download_pfc_data',
     'download_preseason_data',
    
     'is_duplicate',
+    'game_key',
+    'merge_games',
+    'game_fingerprint',
     'correct_date_format',
     'stage_check',
     'rename_week_num',
     'convert_preseason_date',
     'mongo_data_scrubber',
     'find_game_by_date',
+    'GameUpdateQueue',
     'update_game_stage_and_week',
     'assign_team_ids_and_update_json',
     'update_stage_week_and_date',
     'fetch_game_ids_and_update_json',
-    'mongo_bleach'
-    "normalize_week_fields"
+    'mongo_bleach',
+    'normalize_week_fields',
+    'build_season_index',
+    'get_season_index',
+    'write_error_log',
+    'run_pipeline',
+    'assign_team_ids_columnar',
+    'export_parquet',
+    'run_game_store',
+    'ensure_indexes',
+    'report_query_plans',
+    'migrate_game_store',
+    'sync_team_collections',
+    'team_games',
+    'update_stage_week_and_date_async',
+    'mongo_bleach_async',
+    'normalize_week_fields_async'
 ]
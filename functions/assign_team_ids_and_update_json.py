@@ -1,7 +1,65 @@
-import os
 import json
+from modules.season_store import GAMES_DIR, list_seasons, load_season, save_season
+from .columnar import assign_team_ids_columnar, parse_points
+
+def assign_team_ids(games_data, season, team_name_to_id):
+    """Tag each game with its season, team IDs and (for Pre Season) winner/loser, in place."""
+    for game in games_data:
+        home_team = game.get("home_team")
+        visitor_team = game.get("visitor_team")
+        game["season"] = season
+
+        if home_team in team_name_to_id:
+            game["home_team_id"] = team_name_to_id[home_team]
+        if visitor_team in team_name_to_id:
+            game["visitor_team_id"] = team_name_to_id[visitor_team]
+
+        # Determine the winner and loser for Pre Season games
+        if game.get("stage") == "Pre Season":
+            home_points = parse_points(game.get("points_opp"))
+            visitor_points = parse_points(game.get("points"))
+            if home_points is None or visitor_points is None:
+                print(f"Skipping game due to invalid points format: {game}")
+                continue
+
+            if home_points > visitor_points:
+                game["winner"] = home_team
+                game["winner_id"] = team_name_to_id.get(home_team)
+                game["loser"] = visitor_team
+                game["loser_id"] = team_name_to_id.get(visitor_team)
+            else:
+                game["winner"] = visitor_team
+                game["winner_id"] = team_name_to_id.get(visitor_team)
+                game["loser"] = home_team
+                game["loser_id"] = team_name_to_id.get(home_team)
+
+        # Handle Regular/Post Season games
+        if game.get("winner") in team_name_to_id:
+            game["winner_id"] = team_name_to_id[game["winner"]]
+        if game.get("loser") in team_name_to_id:
+            game["loser_id"] = team_name_to_id[game["loser"]]
+
+def assign_team_ids_columnar_and_update_json(games_dir, team_name_to_id):
+    """Load every season into one table, assign IDs column-wise, then save each season back."""
+    seasons = {}
+    for season in list_seasons(games_dir):
+        try:
+            seasons[season] = load_season(season, games_dir)
+            print(f"Loaded games_in_{season}: {len(seasons[season])} games found.")
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON in games_in_{season}: {e}")
+
+    assign_team_ids_columnar(seasons, team_name_to_id)
+
+    for season, games_data in seasons.items():
+        save_season(games_data, season, games_dir)
+        print(f"Updated games_in_{season} and saved changes.")
+
+def assign_team_ids_and_update_json(engine="python", workers=1):
+    if workers > 1 and engine == "python":
+        from .season_workers import run_season_step
+        return run_season_step("assign_team_ids", workers)
 
-def assign_team_ids_and_update_json():
     # Load the teams JSON file
     try:
         with open("data/teams.json", "r", encoding="utf-8") as f:
@@ -32,62 +90,27 @@ def assign_team_ids_and_update_json():
         return
 
     # Loop through all JSON files in the games_by_year_data directory
-    games_dir = "games_by_year_data"
-    for filename in os.listdir(games_dir):
-        if filename.startswith("games_in_") and filename.endswith(".json"):
-            file_path = os.path.join(games_dir, filename)
-            season = filename.split("_")[2].split(".")[0]  # Extract season from filename
-
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    games_data = json.load(f)
-                    print(f"Loaded {filename}: {len(games_data)} games found.")  # Debug statement
-
-                for game in games_data:
-                    home_team = game.get("home_team")
-                    visitor_team = game.get("visitor_team")
-                    game["season"] = season
-
-                    if home_team in team_name_to_id:
-                        game["home_team_id"] = team_name_to_id[home_team]
-                    if visitor_team in team_name_to_id:
-                        game["visitor_team_id"] = team_name_to_id[visitor_team]
-
-                    # Determine the winner and loser for Pre Season games
-                    if game["stage"] == "Pre Season":
-                        try:
-                            home_points = int(game["points_opp"])
-                            visitor_points = int(game["points"])
-                        except ValueError:
-                            print(f"Skipping game due to invalid points format: {game}")
-                            continue
-
-                        if home_points > visitor_points:
-                            game["winner"] = home_team
-                            game["winner_id"] = team_name_to_id.get(home_team)
-                            game["loser"] = visitor_team
-                            game["loser_id"] = team_name_to_id.get(visitor_team)
-                        else:
-                            game["winner"] = visitor_team
-                            game["winner_id"] = team_name_to_id.get(visitor_team)
-                            game["loser"] = home_team
-                            game["loser_id"] = team_name_to_id.get(home_team)
-
-                    # Handle Regular/Post Season games
-                    if game.get("winner") in team_name_to_id:
-                        game["winner_id"] = team_name_to_id[game["winner"]]
-                    if game.get("loser") in team_name_to_id:
-                        game["loser_id"] = team_name_to_id[game["loser"]]
-
-                # Save the updated game data back to the file
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(games_data, f, indent=4)
-                    print(f"Updated {filename} and saved changes.")  # Debug statement
-
-            except FileNotFoundError:
-                print(f"Error: {filename} not found.")
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON in {filename}: {e}")
+    games_dir = GAMES_DIR
+    if engine == "columnar":
+        assign_team_ids_columnar_and_update_json(games_dir, team_name_to_id)
+        return
+
+    for season in list_seasons(games_dir):
+        filename = f"games_in_{season}"
+        try:
+            games_data = load_season(season, games_dir)
+            print(f"Loaded {filename}: {len(games_data)} games found.")  # Debug statement
+
+            assign_team_ids(games_data, season, team_name_to_id)
+
+            # Save the updated game data back to the file
+            save_season(games_data, season, games_dir)
+            print(f"Updated {filename} and saved changes.")  # Debug statement
+
+        except FileNotFoundError:
+            print(f"Error: {filename} not found.")
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON in {filename}: {e}")
 
 if __name__ == "__main__":
     assign_team_ids_and_update_json()
@@ -0,0 +1,50 @@
+# functions/async_scrub.py
+# "Async" here means asyncio fanning the ordinary, blocking pymongo calls out to worker threads
+# (asyncio.to_thread) over the shared pooled client; it is not an async driver like Motor.
+import asyncio
+
+DEFAULT_CONCURRENCY = 8  # Collections worked on at once in async mode
+
+async def gather_collections(collection_names, work, concurrency=DEFAULT_CONCURRENCY):
+    """Run work(collection_name) for every collection on worker threads, at most `concurrency` at once.
+
+    work is a plain blocking function (sync pymongo calls); each call runs in asyncio.to_thread.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(collection_name):
+        async with semaphore:
+            return collection_name, await asyncio.to_thread(work, collection_name)
+
+    return dict(await asyncio.gather(*(run(name) for name in collection_names)))
+
+def run_over_collections(collection_names, work, concurrency=1):
+    """Apply work to each collection and return {collection_name: result}; concurrent when concurrency > 1."""
+    collection_names = list(collection_names)
+    if concurrency <= 1:
+        return {name: work(name) for name in collection_names}
+    return asyncio.run(gather_collections(collection_names, work, concurrency))
+
+def update_stage_week_and_date_async(concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    from .pipeline import run_pipeline
+    return run_pipeline(stages=["update_stage_week_and_date"], concurrency=concurrency, **kwargs)
+
+def mongo_bleach_async(concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    from .pipeline import run_pipeline
+    return run_pipeline(stages=["mongo_bleach"], concurrency=concurrency, **kwargs)
+
+def normalize_week_fields_async(concurrency=DEFAULT_CONCURRENCY, server_side=True, dry_run=False):
+    """normalize_week_fields over `concurrency` collections at once. Returns {collection_name: count}."""
+    from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+    from .normalize_week_fields import normalize_collection_weeks
+
+    client = get_mongo_client()
+    try:
+        db = get_database(client)
+        results = run_over_collections(
+            db.list_collection_names(), lambda name: normalize_collection_weeks(db[name], server_side, dry_run), concurrency
+        )
+    finally:
+        release_mongo_client(client)
+    print("🎉 Done normalizing week fields.")
+    return results
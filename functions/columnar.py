@@ -0,0 +1,90 @@
+# functions/columnar.py
+# Optional pandas engine for the JSON-side team ID pass. pandas is not a hard requirement;
+# it is only imported when the columnar engine is selected.
+
+COLUMNS = ["season", "stage", "home_team", "visitor_team", "points", "points_opp", "winner", "loser"]
+
+def parse_points(value):
+    """A scraped score as an int, or None when it is missing or doesn't parse (both engines read scores with this)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _require_pandas():
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError("The columnar engine needs pandas (pip install pandas).")
+    return pd
+
+def seasons_to_frame(seasons):
+    """Flatten {season: [game, ...]} into one table, one row per game, in file order."""
+    pd = _require_pandas()
+    rows = [
+        (season, game.get("stage"), game.get("home_team"), game.get("visitor_team"),
+         game.get("points"), game.get("points_opp"), game.get("winner"), game.get("loser"))
+        for season, games_data in seasons.items()
+        for game in games_data
+    ]
+    return pd.DataFrame(rows, columns=COLUMNS, dtype=object)
+
+def map_team_ids(pd, names, team_name_to_id):
+    """Index join of a team-name column onto team IDs. Returns (ids, found) as Python lists."""
+    codes = pd.Index(list(team_name_to_id)).get_indexer(names)
+    id_lookup = pd.Series(list(team_name_to_id.values()) + [None], dtype=object).to_numpy()
+    ids = id_lookup[codes]  # code -1 (not a known team) picks the trailing None
+    return ids.tolist(), (codes >= 0).tolist()
+
+def assign_team_ids_columnar(seasons, team_name_to_id):
+    """Same result as assign_team_ids over every season, computed on whole columns at once."""
+    pd = _require_pandas()
+    frame = seasons_to_frame(seasons)
+    if frame.empty:
+        return
+
+    home_ids, home_found = map_team_ids(pd, frame["home_team"], team_name_to_id)
+    visitor_ids, visitor_found = map_team_ids(pd, frame["visitor_team"], team_name_to_id)
+
+    # Pre Season winner/loser come from the points; rows whose points are missing or don't parse
+    # are skipped and logged. Scores go through parse_points so they read exactly as in the python engine.
+    preseason = (frame["stage"] == "Pre Season").to_numpy()
+    home_points = pd.to_numeric(frame["points_opp"].map(parse_points), errors="coerce")
+    visitor_points = pd.to_numeric(frame["points"].map(parse_points), errors="coerce")
+    scored = (home_points.notna() & visitor_points.notna()).to_numpy()
+    home_wins = (home_points > visitor_points).to_numpy()
+    derive = preseason & scored
+    skip = preseason & ~scored
+
+    winner = frame["winner"].where(~derive, frame["home_team"].where(home_wins, frame["visitor_team"]))
+    loser = frame["loser"].where(~derive, frame["visitor_team"].where(home_wins, frame["home_team"]))
+    winner_ids, winner_found = map_team_ids(pd, winner, team_name_to_id)
+    loser_ids, loser_found = map_team_ids(pd, loser, team_name_to_id)
+
+    # Write back into the original dicts so key order and untouched fields stay exactly as before
+    winner = winner.tolist()
+    loser = loser.tolist()
+    derive = derive.tolist()
+    skip = skip.tolist()
+    row = 0
+    for season, games_data in seasons.items():
+        for game in games_data:
+            game["season"] = season
+            if home_found[row]:
+                game["home_team_id"] = home_ids[row]
+            if visitor_found[row]:
+                game["visitor_team_id"] = visitor_ids[row]
+
+            if skip[row]:
+                print(f"Skipping game due to invalid points format: {game}")
+            else:
+                if derive[row]:
+                    game["winner"] = winner[row]
+                    game["winner_id"] = winner_ids[row]
+                    game["loser"] = loser[row]
+                    game["loser_id"] = loser_ids[row]
+                if winner_found[row]:
+                    game["winner_id"] = winner_ids[row]
+                if loser_found[row]:
+                    game["loser_id"] = loser_ids[row]
+            row += 1
@@ -1,16 +1,32 @@
 # data_check.py
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor
+
+MISSING_GAME_FILTER = {"$or": [{"games.game.stage": None}, {"games.game.week": None}]}
+
+# Count games missing stage/week on the server so only (season, count) pairs come back
+MISSING_DATA_PIPELINE = [
+    {"$match": MISSING_GAME_FILTER},
+    {"$project": {"games.game.stage": 1, "games.game.week": 1, "games.league.season": 1}},
+    {"$unwind": "$games"},
+    {"$match": MISSING_GAME_FILTER},
+    {"$group": {"_id": "$games.league.season", "count": {"$sum": 1}}}
+]
 
 def check_missing_data_by_year(db, team_name):
     collection = db[team_name]
     missing_data_by_year = {}
 
-    for doc in collection.find({"$or": [{"games.game.stage": None}, {"games.game.week": None}]}):
-        for game in doc.get("games", []):
-            year = int(game["league"]["season"])
-            if game["game"].get("stage") is None or game["game"].get("week") is None:
-                if year not in missing_data_by_year:
-                    missing_data_by_year[year] = 0
-                missing_data_by_year[year] += 1
+    for result in collection.aggregate(MISSING_DATA_PIPELINE):
+        year = int(result["_id"])
+        missing_data_by_year[year] = missing_data_by_year.get(year, 0) + result["count"]
 
     return missing_data_by_year
+
+def check_missing_data_for_collections(db, collection_names, concurrency=1):
+    """Run check_missing_data_by_year over several collections, up to `concurrency` at a time."""
+    if concurrency <= 1:
+        return {name: check_missing_data_by_year(db, name) for name in collection_names}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(lambda name: check_missing_data_by_year(db, name), collection_names)
+        return dict(zip(collection_names, results))
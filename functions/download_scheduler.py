@@ -0,0 +1,119 @@
+# functions/download_scheduler.py
+# In-process scheduler for download_all: (year, season type) jobs over a bounded worker pool,
+# with exponential backoff and a job-state file so a rerun only picks up what didn't finish.
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+from modules.page_cache import PageCache, PageCacheMiss
+from modules.profiling import phase
+from modules.season_store import atomic_write
+from .web_scraper import (
+    DriverPool, RateLimiter, get_http_session, download_data_for_year,
+    parse_preseason_data, parse_regular_season_data, PRESEASON_URL, REGULAR_SEASON_URL, DEFAULT_WORKERS
+)
+
+DOWNLOAD_STATE_FILE = "download_state.json"
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 5  # Seconds before the first retry; doubles with every attempt
+BACKOFF_CAP = 120
+
+# Season type -> (URL template, parser); preseason first so each year's file is built in the usual order
+SEASON_TYPES = {
+    "preseason": (PRESEASON_URL, parse_preseason_data),
+    "regular season": (REGULAR_SEASON_URL, parse_regular_season_data),
+}
+
+def job_id(year, season_type):
+    return f"{year}:{season_type}"
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full-jitter exponential backoff: a random wait up to base * 2**attempt, capped."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class JobState:
+    """Job statuses persisted to a JSON file after every change, so an interrupted run can resume."""
+
+    def __init__(self, path=DOWNLOAD_STATE_FILE, restart=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.jobs = {}
+        if not restart and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.jobs = json.load(f)
+
+    def is_done(self, job):
+        return self.jobs.get(job, {}).get("status") == "done"
+
+    def update(self, job, status, attempts, error=None):
+        with self._lock:
+            self.jobs[job] = {"status": status, "attempts": attempts, "error": error, "updated_at": time.time()}
+            snapshot = dict(self.jobs)
+            atomic_write(self.path, lambda f: json.dump(snapshot, f, indent=4, sort_keys=True))
+
+def run_job(year, season_type, state, max_attempts, **download_options):
+    """Download one (year, season type), retrying with backoff. Returns True when it succeeded."""
+    base_url, parse_function = SEASON_TYPES[season_type]
+    job = job_id(year, season_type)
+    for attempt in range(max_attempts):
+        state.update(job, "running", attempt + 1)
+        try:
+            # The scheduler owns retries, so the download itself fails fast
+            download_data_for_year(year, season_type, base_url, parse_function, max_retries=0, **download_options)
+        except PageCacheMiss as e:
+            # Offline cache miss: retrying can't help
+            state.update(job, "failed", attempt + 1, str(e))
+            return False
+        except Exception as e:
+            if attempt + 1 == max_attempts:
+                state.update(job, "failed", attempt + 1, str(e))
+                tqdm.write(f"❌ {job} failed after {max_attempts} attempts: {e}")
+                return False
+            delay = backoff_delay(attempt)
+            state.update(job, "retrying", attempt + 1, str(e))
+            tqdm.write(f"🔁 {job} failed ({e}); retrying in {delay:.1f}s...")
+            with phase("sleep"):
+                time.sleep(delay)
+        else:
+            state.update(job, "done", attempt + 1)
+            return True
+
+def run_download_jobs(years, workers=DEFAULT_WORKERS, backend="selenium", use_cache=True, offline=False,
+                      state_path=DOWNLOAD_STATE_FILE, restart=False, max_attempts=MAX_ATTEMPTS):
+    """Download every (year, season type) not already done, `workers` at a time. Returns {job: succeeded}."""
+    state = JobState(state_path, restart)
+    jobs = [(year, season_type) for year in years for season_type in SEASON_TYPES]
+    pending = [(year, season_type) for year, season_type in jobs if not state.is_done(job_id(year, season_type))]
+    if len(pending) < len(jobs):
+        print(f"Resuming: {len(jobs) - len(pending)} of {len(jobs)} jobs already done (see {state_path}).")
+    if not pending:
+        return {}
+
+    pool = DriverPool(size=workers)
+    cache = PageCache() if use_cache or offline else None
+    rate_limiter = RateLimiter()
+    if backend == "http":
+        get_http_session(workers)
+    download_options = {"pool": pool, "rate_limiter": rate_limiter, "backend": backend, "cache": cache, "offline": offline}
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor, tqdm(total=len(pending), desc="download_all", unit="job") as progress:
+            futures = {
+                executor.submit(run_job, year, season_type, state, max_attempts, **download_options): job_id(year, season_type)
+                for year, season_type in pending
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                progress.update(1)
+    finally:
+        pool.close()
+
+    failed = sorted(job for job, succeeded in results.items() if not succeeded)
+    print(f"✅ {len(results) - len(failed)} jobs done, {len(failed)} failed.")
+    if failed:
+        print(f"Failed jobs: {', '.join(failed)}. Run download_all again to retry only these.")
+    return results
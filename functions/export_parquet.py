@@ -0,0 +1,237 @@
+# functions/export_parquet.py
+# Flat, season-partitioned Parquet export of the cleaned MongoDB data for analytics jobs.
+# pyarrow is only imported when an export actually runs.
+import os
+import json
+import hashlib
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+from modules.season_store import atomic_write
+
+EXPORT_DIR = "export"
+STATE_FILE = "_export_state.json"
+ROW_GROUP_SIZE = 50_000
+
+# Output column -> (source path inside one unwound games entry, arrow type name)
+EXPORT_FIELDS = {
+    "game_id": ("$games.game.id", "int64"),
+    "stage": ("$games.game.stage", "string"),
+    "week": ("$games.game.week", "string"),
+    "date": ("$games.game.date.date", "string"),
+    "time": ("$games.game.date.time", "string"),
+    "timezone": ("$games.game.date.timezone", "string"),
+    "timestamp": ("$games.game.date.timestamp", "int64"),
+    "venue_name": ("$games.game.venue.name", "string"),
+    "venue_city": ("$games.game.venue.city", "string"),
+    "status": ("$games.game.status.short", "string"),
+    "home_team_id": ("$games.teams.home.id", "int64"),
+    "home_team": ("$games.teams.home.name", "string"),
+    "away_team_id": ("$games.teams.away.id", "int64"),
+    "away_team": ("$games.teams.away.name", "string"),
+    "home_q1": ("$games.scores.home.quarter_1", "int32"),
+    "home_q2": ("$games.scores.home.quarter_2", "int32"),
+    "home_q3": ("$games.scores.home.quarter_3", "int32"),
+    "home_q4": ("$games.scores.home.quarter_4", "int32"),
+    "home_ot": ("$games.scores.home.overtime", "int32"),
+    "home_total": ("$games.scores.home.total", "int32"),
+    "away_q1": ("$games.scores.away.quarter_1", "int32"),
+    "away_q2": ("$games.scores.away.quarter_2", "int32"),
+    "away_q3": ("$games.scores.away.quarter_3", "int32"),
+    "away_q4": ("$games.scores.away.quarter_4", "int32"),
+    "away_ot": ("$games.scores.away.overtime", "int32"),
+    "away_total": ("$games.scores.away.total", "int32"),
+    "fingerprint": ("$games.game.fingerprint", "string"),
+}
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("The Parquet export needs pyarrow (pip install pyarrow).")
+    return pa, pq
+
+def export_schema(pa):
+    return pa.schema([(name, getattr(pa, type_name)()) for name, (_, type_name) in EXPORT_FIELDS.items()])
+
+def export_pipeline(season):
+    """Unwind and flatten one season's games on the server so only export columns come back."""
+    return [
+        {"$match": {"parameters.season": season}},
+        {"$project": {"games": 1}},
+        {"$unwind": "$games"},
+        {"$project": {"_id": 0, **{name: source for name, (source, _) in EXPORT_FIELDS.items()}}},
+    ]
+
+def coerce_row(row):
+    """Scraped values arrive as ints, numeric strings or nulls; make them match the schema."""
+    for name, (_, type_name) in EXPORT_FIELDS.items():
+        value = row.get(name)
+        if value is None:
+            row[name] = None
+        elif type_name == "string":
+            row[name] = str(value)
+        else:
+            try:
+                row[name] = int(value)
+            except (TypeError, ValueError):
+                row[name] = None
+    return row
+
+def signature_pipeline():
+    """Each team/season document's season and modified-at stamp, read from the season_updated index alone."""
+    return [
+        {"$sort": {"parameters.season": 1, "parameters.updated_at": 1}},
+        {"$project": {"_id": 0, "season": "$parameters.season", "updated_at": "$parameters.updated_at"}},
+    ]
+
+def season_signatures(db, collection_names):
+    """season -> hash of the modified-at stamp of every document in that season.
+
+    Every scrub write stamps parameters.updated_at (game_utils.stamp_modified), so this is all an
+    incremental run needs to read. Edits made outside the scrub steps don't stamp it; --verify catches those.
+    """
+    hashes = {}
+    for name in collection_names:
+        for row in db[name].aggregate(signature_pipeline()):
+            season = str(row.get("season"))
+            hashes.setdefault(season, hashlib.sha1()).update(f"{name}|{row.get('updated_at')}\n".encode("utf-8"))
+    return {season: digest.hexdigest() for season, digest in hashes.items()}
+
+def sources_pipeline(season):
+    """Game ID and fingerprint of every game stored for one season."""
+    return [
+        {"$match": {"parameters.season": season}},
+        {"$project": {"games.game.id": 1, "games.game.fingerprint": 1}},
+        {"$unwind": "$games"},
+        {"$project": {"_id": 0, "game_id": "$games.game.id", "fingerprint": "$games.game.fingerprint"}},
+    ]
+
+def season_sources(db, collection_names, season):
+    """{game id: collection whose copy gets exported} for one season.
+
+    A game is stored under both teams' collections; the copy is picked like merge_game_copies
+    does: the fingerprinted one, otherwise the first seen.
+    """
+    picks = {}
+    for name in collection_names:
+        for row in db[name].aggregate(sources_pipeline(season)):
+            game_id = row.get("game_id")
+            if game_id is None:
+                continue
+            picked = picks.get(game_id)
+            if picked is None or (row.get("fingerprint") and not picked[1]):
+                picks[game_id] = (name, bool(row.get("fingerprint")))
+    return {game_id: name for game_id, (name, _) in picks.items()}
+
+def update_content_hash(digest, name, row):
+    """Fold one stored copy's export columns into a season's content hash."""
+    row_key = json.dumps(row, sort_keys=True, default=str)
+    digest.update(f"{name}|{row_key}\n".encode("utf-8"))
+
+def season_content_hash(db, collection_names, season):
+    """Hash of every exported column of every stored copy in one season. Reads the whole season (--verify only)."""
+    digest = hashlib.sha1()
+    for name in collection_names:
+        for row in db[name].aggregate(export_pipeline(season)):
+            update_content_hash(digest, name, row)
+    return digest.hexdigest()
+
+def load_export_state(export_dir):
+    path = os.path.join(export_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_export_state(export_dir, state):
+    atomic_write(os.path.join(export_dir, STATE_FILE), lambda f: json.dump(state, f, indent=4, sort_keys=True))
+
+def export_season(db, collection_names, season, export_dir=EXPORT_DIR, row_group_size=ROW_GROUP_SIZE, sources=None, digest=None):
+    """Stream one season from every collection into export_dir/season=<season>/part-0.parquet.
+
+    A game is stored under both teams' collections, so it is written once per season, from the
+    collection `sources` ({game id: collection}, from season_sources) picks for it. Every copy read
+    is folded into `digest` when given (see season_content_hash).
+    At most row_group_size rows are held in memory. Returns the number of rows written.
+    """
+    pa, pq = _require_pyarrow()
+    if sources is None:
+        sources = season_sources(db, collection_names, season)
+    schema = export_schema(pa)
+    partition_dir = os.path.join(export_dir, f"season={season}")
+    os.makedirs(partition_dir, exist_ok=True)
+    path = os.path.join(partition_dir, "part-0.parquet")
+    tmp_path = os.path.join(partition_dir, ".tmp_part-0.parquet")
+
+    seen_ids = set()
+    batch = []
+    written = 0
+    writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+    try:
+        for name in collection_names:
+            for row in db[name].aggregate(export_pipeline(season), batchSize=row_group_size):
+                if digest is not None:
+                    update_content_hash(digest, name, row)
+                game_id = row.get("game_id")
+                if game_id is not None:
+                    if game_id in seen_ids or sources.get(game_id, name) != name:
+                        continue
+                    seen_ids.add(game_id)
+                batch.append(coerce_row(row))
+                if len(batch) >= row_group_size:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    written += len(batch)
+                    batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+        writer.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+def export_parquet(export_dir=EXPORT_DIR, seasons=None, incremental=True, row_group_size=ROW_GROUP_SIZE, verify=False):
+    """Export the games collections as a hive-partitioned Parquet dataset (export_dir/season=YYYY/).
+
+    With incremental=True only seasons whose modified-at stamps changed since the last export are
+    rewritten. verify=True also re-reads every season's exported columns and rewrites any whose
+    content no longer matches the export (e.g. after edits made outside the scrub steps).
+    Read it lazily with e.g. pyarrow.dataset.dataset(export_dir, partitioning="hive").
+    """
+    _require_pyarrow()
+    client = get_mongo_client()
+    try:
+        db = get_database(client)
+        collection_names = sorted(db.list_collection_names())
+        signatures = season_signatures(db, collection_names)
+        state = load_export_state(export_dir)
+
+        targets = sorted(signatures) if seasons is None else [str(season) for season in seasons if str(season) in signatures]
+        total = 0
+        for season in targets:
+            exported = state.get(season)
+            if not isinstance(exported, dict):
+                exported = {}  # Nothing exported yet, or state written before the stamps existed
+            if incremental and exported.get("signature") == signatures[season]:
+                if not verify or season_content_hash(db, collection_names, season) == exported.get("content"):
+                    print(f"⏭️  Season {season} unchanged since the last export.")
+                    continue
+                print(f"🔎 Season {season} changed without a modified-at stamp; re-exporting.")
+            digest = hashlib.sha1()
+            rows = export_season(db, collection_names, season, export_dir, row_group_size, digest=digest)
+            state[season] = {"signature": signatures[season], "content": digest.hexdigest()}
+            save_export_state(export_dir, state)
+            total += rows
+            print(f"✅ Exported season {season}: {rows} games.")
+
+        print(f"Total games exported: {total}")
+        return total
+    finally:
+        release_mongo_client(client)
+
+if __name__ == "__main__":
+    export_parquet()
@@ -0,0 +1,212 @@
+# functions/game_store.py
+# Optional normalized store: one document per game (keyed by game.id) instead of one copy per team.
+# It lives in its own database so list_collection_names() on nfl_games_by_year keeps meaning "team collections".
+from pymongo import ASCENDING, ReplaceOne, UpdateOne
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+from .update_stage_week_and_date import build_game_set, flush_game_updates, DEFAULT_BATCH_SIZE
+from .game_utils import game_fingerprint, stamp_modified
+
+GAME_STORE_DB = "nfl_game_store"
+GAMES_COLLECTION = "games"
+STORE_FIELDS = ("_id", "season", "team_ids")  # Added by the store on top of the legacy game entry
+
+# Same bare-week test as normalize_week_fields, for top-level game documents
+BARE_STORE_WEEK_FILTER = {"$or": [
+    {"game.week": {"$type": "int"}},
+    {"game.week": {"$type": "long"}},
+    {"game.week": {"$regex": "^[0-9]+$"}},
+]}
+PREFIX_STORE_WEEK_UPDATE = [{"$set": {"game.week": {"$concat": ["Week ", {"$toString": "$game.week"}]}}}]
+
+def get_game_store(client):
+    return get_database(client, GAME_STORE_DB)[GAMES_COLLECTION]
+
+def ensure_game_store_indexes(store):
+    """Per-team access goes through the team_ids multikey index instead of per-team collections."""
+    store.create_index([("team_ids", ASCENDING), ("season", ASCENDING)])
+    store.create_index([("season", ASCENDING), ("game.date.date", ASCENDING)])
+
+def team_games(store, team_id, season=None):
+    """One team's games from the store, in date order (what a legacy team collection held)."""
+    query = {"team_ids": team_id}
+    if season is not None:
+        query["season"] = str(season)
+    return store.find(query).sort("game.date.date", ASCENDING)
+
+def strip_store_fields(document):
+    """Turn a store document back into the legacy games[] entry."""
+    return {key: value for key, value in document.items() if key not in STORE_FIELDS}
+
+def fill_missing(primary, other):
+    """Fill None/missing values in primary from other, recursively. Returns primary."""
+    for key, value in other.items():
+        if isinstance(primary.get(key), dict) and isinstance(value, dict):
+            fill_missing(primary[key], value)
+        elif primary.get(key) is None:
+            primary[key] = value
+    return primary
+
+def merge_game_copies(first, second):
+    """Combine the two team copies of a game; the one the scrub last wrote (fingerprinted) wins."""
+    if second["game"].get("fingerprint") and not first["game"].get("fingerprint"):
+        first, second = second, first
+    return fill_missing(first, second)
+
+def migrate_game_store(db, store, batch_size=DEFAULT_BATCH_SIZE):
+    """Build the store from every team collection, writing each game once. Returns games written."""
+    games_by_id = {}
+    for collection_name in sorted(db.list_collection_names()):
+        for document in db[collection_name].find({}, {"_id": 0, "games": 1}):
+            for entry in document.get("games", []):
+                game_id = entry["game"]["id"]
+                existing = games_by_id.get(game_id)
+                games_by_id[game_id] = entry if existing is None else merge_game_copies(existing, entry)
+
+    operations = []
+    for game_id, entry in games_by_id.items():
+        document = {
+            "_id": game_id,
+            "season": str(entry.get("league", {}).get("season")),
+            "team_ids": [entry["teams"]["home"]["id"], entry["teams"]["away"]["id"]],
+            **entry,
+        }
+        operations.append(ReplaceOne({"_id": game_id}, document, upsert=True))
+
+    ensure_game_store_indexes(store)
+    if not operations:
+        print("➖ No games found in the team collections.")
+        return 0
+
+    for start in range(0, len(operations), batch_size):
+        store.bulk_write(operations[start:start + batch_size], ordered=False)
+    print(f"✅ Game store: {len(operations)} games written.")
+    return len(operations)
+
+def prepare_game_store(db, store, batch_size=DEFAULT_BATCH_SIZE):
+    """Make sure the store holds games before a scrub writes to it; an empty store is migrated first.
+
+    Returns False when there is nothing to scrub (no store and no team collections to build it from).
+    """
+    if store.find_one({}, {"_id": 1}) is not None:
+        return True
+    print("📦 The game store is empty; migrating the team collections into it first...")
+    if migrate_game_store(db, store, batch_size) == 0:
+        print("❌ Game store: nothing to migrate, so there is nothing to scrub. Load the team collections first.")
+        return False
+    return True
+
+def sync_team_collections(db, store, batch_size=DEFAULT_BATCH_SIZE):
+    """Copy each stored game over both of its team-collection copies, where they differ. Returns copies updated."""
+    updated_games_count = 0
+    for collection_name in sorted(db.list_collection_names()):
+        collection = db[collection_name]
+        legacy = {}
+        for document in collection.find({}, {"games": 1}):
+            for entry in document.get("games", []):
+                legacy[entry["game"]["id"]] = (document["_id"], entry)
+
+        operations = []
+        game_ids = list(legacy)
+        for start in range(0, len(game_ids), batch_size):
+            for stored in store.find({"_id": {"$in": game_ids[start:start + batch_size]}}):
+                document_id, entry = legacy[stored["_id"]]
+                stored_entry = strip_store_fields(stored)
+                if stored_entry != entry:
+                    operations.append(UpdateOne(
+                        {"_id": document_id},
+                        stamp_modified({"$set": {"games.$[g]": stored_entry}}),
+                        array_filters=[{"g.game.id": stored["_id"]}]
+                    ))
+
+        if operations:
+            matched, modified = flush_game_updates(collection, operations, batch_size)
+            print(f"✅ {collection_name}: {modified} games synced from the game store.")
+            updated_games_count += modified
+        else:
+            print(f"➖ {collection_name}: already in sync.")
+    return updated_games_count
+
+def update_game_store(store, games, team_id_to_logo, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """The update_stage_week_and_date write, made once per game against the store. Returns (updated, error_log)."""
+    error_log = []
+    fingerprints = {}
+    changed = []
+    for game in games:
+        if "game_id" not in game or not game.get("winner_id") or not game.get("loser_id"):
+            continue
+        fingerprints[id(game)] = game_fingerprint(game, team_id_to_logo)
+        if force or game.get("fingerprint") != fingerprints[id(game)]:
+            changed.append(game)
+
+    operations = []
+    queued = []
+    for start in range(0, len(changed), batch_size):
+        chunk = changed[start:start + batch_size]
+        stored = {
+            document["_id"]: document
+            for document in store.find({"_id": {"$in": [game["game_id"] for game in chunk]}}, {"teams.home.id": 1, "teams.away.id": 1, "game.fingerprint": 1})
+        }
+        for game in chunk:
+            game_id = game["game_id"]
+            fingerprint = fingerprints[id(game)]
+            document = stored.get(game_id)
+            if document is None:
+                error_message = f"Game with ID {game_id} not found in the game store."
+                print(error_message)
+                error_log.append({
+                    "game_id": game_id,
+                    "winner": game.get("winner"),
+                    "loser": game.get("loser"),
+                    "game_date": game.get("game_date"),
+                    "season": game.get("season"),
+                    "collection": GAMES_COLLECTION,
+                    "error": error_message
+                })
+                continue
+
+            if not force and document["game"].get("fingerprint") == fingerprint:
+                game["fingerprint"] = fingerprint
+                continue
+
+            game_set = build_game_set(game, document["teams"]["home"]["id"], document["teams"]["away"]["id"], team_id_to_logo, prefix="")
+            game_set["game.fingerprint"] = fingerprint
+            operations.append(UpdateOne({"_id": game_id}, {"$set": game_set}))
+            queued.append((game, fingerprint))
+
+    if not operations:
+        print("➖ Game store: no changes needed.")
+        return 0, error_log
+
+    matched, modified = flush_game_updates(store, operations, batch_size)
+    for game, fingerprint in queued:
+        game["fingerprint"] = fingerprint
+    print(f"✅ Game store: {matched} games matched, {modified} games modified.")
+    return modified, error_log
+
+def normalize_store_weeks(store):
+    """Prefix bare week numbers with 'Week ' in the store, on the server."""
+    result = store.update_many(BARE_STORE_WEEK_FILTER, PREFIX_STORE_WEEK_UPDATE)
+    print(f"✅ Game store: {result.modified_count} week values normalized.")
+    return result.modified_count
+
+def run_game_store(sync=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Migrate the team collections into the store, or (sync=True) push the store back out to them."""
+    client = get_mongo_client()
+    try:
+        db = get_database(client)
+        store = get_game_store(client)
+        if sync:
+            if store.find_one({}, {"_id": 1}) is None:
+                print("❌ The game store is empty; run the migrate_games action first.")
+                return
+            print("🔄 Syncing team collections from the game store...")
+            updated = sync_team_collections(db, store, batch_size)
+            print(f"Total games updated in MongoDB: {updated}")
+        else:
+            print("📦 Migrating team collections into the game store...")
+            migrate_game_store(db, store, batch_size)
+    finally:
+        release_mongo_client(client)
+
+if __name__ == "__main__":
+    run_game_store()
@@ -1,7 +1,10 @@
 from datetime import datetime, timedelta
 import os
 import json
-from pymongo import MongoClient
+import hashlib
+import threading
+from pymongo import MongoClient, UpdateOne
+from modules.season_store import GAMES_DIR, find_season_file, season_exists, season_path, load_season
 
 # Utility functions for date manipulation and MongoDB updates
 
@@ -12,6 +15,82 @@ def is_duplicate(existing_data, new_data):
             return True
     return False
 
+def game_key(game, season=None):
+    """Canonical identity of a scraped game: (season, stage, week, teams, date)."""
+    if game.get("stage") == "Pre Season":
+        teams = (game.get("visitor_team"), game.get("home_team"))
+    else:
+        teams = (game.get("winner"), game.get("loser"))
+    return (
+        str(season if season is not None else game.get("season")),
+        game.get("stage"),
+        game.get("week_num"),
+        tuple(sorted(team or "" for team in teams)),
+        game.get("game_date"),
+    )
+
+# Scraped fields that decide who won; when one changes, everything derived from the old result is stale
+RESULT_FIELDS = ("winner", "loser", "pts_win", "pts_lose", "points", "points_opp")
+# Fields the later steps derive from the result (assign_ids, fetch_ids, the scrub fingerprint)
+DERIVED_FIELDS = ("winner_id", "loser_id", "game_id", "fingerprint")
+
+def drop_derived_fields(existing, game):
+    """Forget IDs/fingerprint (and Pre Season's computed winner/loser) worked out from a result that changed."""
+    for field in DERIVED_FIELDS:
+        existing.pop(field, None)
+    if existing.get("stage") == "Pre Season":
+        for field in ("winner", "loser"):
+            if field not in game:
+                existing.pop(field, None)
+
+def merge_games(existing_data, new_data, season=None):
+    """Merge new games into existing_data by game_key, updating stale rows in place. Returns (added, updated).
+
+    A changed result (e.g. a score correction that flips the winner) also drops the derived fields,
+    so the next assign_ids/fetch_ids run recomputes them instead of keeping the old winner's IDs.
+    """
+    index = {}
+    for i, game in enumerate(existing_data):
+        index.setdefault(game_key(game, season), i)
+
+    added = updated = 0
+    for game in new_data:
+        key = game_key(game, season)
+        if key in index:
+            existing = existing_data[index[key]]
+            if any(existing.get(field) != value for field, value in game.items()):
+                if any(field in game and existing.get(field) != game[field] for field in RESULT_FIELDS):
+                    drop_derived_fields(existing, game)
+                existing.update(game)
+                updated += 1
+        else:
+            index[key] = len(existing_data)
+            existing_data.append(game)
+            added += 1
+    return added, updated
+
+# JSON fields that the scrub steps copy onto a MongoDB game
+FINGERPRINT_FIELDS = ("stage", "week_num", "game_date", "winner", "winner_id", "loser", "loser_id")
+
+def game_fingerprint(game, team_id_to_logo=None):
+    """Short hash of everything the scrub steps would write to MongoDB for this game."""
+    payload = {field: game.get(field) for field in FINGERPRINT_FIELDS}
+    if team_id_to_logo is not None:
+        payload["winner_logo"] = team_id_to_logo.get(game.get("winner_id"))
+        payload["loser_logo"] = team_id_to_logo.get(game.get("loser_id"))
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+# Every scrub write to a team collection stamps its document here, so readers (the Parquet export)
+# can tell which seasons changed without reading the games
+MODIFIED_FIELD = "parameters.updated_at"
+
+def stamp_modified(update):
+    """Add the modified-at stamp to an update document, or to an aggregation-pipeline update."""
+    if isinstance(update, list):
+        return update + [{"$set": {MODIFIED_FIELD: "$$NOW"}}]
+    return {**update, "$currentDate": {MODIFIED_FIELD: True}}
+
 def correct_date_format(date_str, year):
     """Convert a date in 'Month Day' format to 'YYYY-MM-DD' format."""
     try:
@@ -58,113 +137,221 @@ def rename_week_num(week_num):
         return "Super Bowl"
     return week_num
 
+def build_season_index(document):
+    """Key a team/season document's games by (team_id, date) and (winner_id, loser_id)."""
+    index = {"by_date": {}, "by_teams": {}}
+    if not document:
+        return index
+
+    for game in document.get("games", []):
+        game_date = game["game"]["date"]["date"]
+        home_id = game["teams"]["home"]["id"]
+        away_id = game["teams"]["away"]["id"]
+        index["by_date"].setdefault((home_id, game_date), game)
+        index["by_date"].setdefault((away_id, game_date), game)
+
+        home_total = game["scores"]["home"]["total"]
+        away_total = game["scores"]["away"]["total"]
+        if home_total is None or away_total is None:
+            continue
+        winner_id = home_id if home_total > away_total else away_id
+        loser_id = home_id if home_total < away_total else away_id
+        index["by_teams"].setdefault((winner_id, loser_id), game)
+    return index
+
+def get_season_index(db, season_indexes, collection_name, season):
+    """Return the index for a team/season, loading the document only the first time it is asked for."""
+    key = (collection_name, str(season))
+    if key not in season_indexes:
+        document = db[collection_name].find_one({"parameters.season": str(season)}, {"games": 1})
+        season_indexes[key] = build_season_index(document)
+    return season_indexes[key]
+
+def write_error_log(error_log, timestamp=None):
+    """Dump a step's unmatched-game errors to test_responses/id_errors_<timestamp>.json. Returns the path, if any."""
+    if not error_log:
+        return None
+    os.makedirs("test_responses", exist_ok=True)
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d%H%M%S")
+    error_log_path = os.path.join("test_responses", f"id_errors_{timestamp}.json")
+    with open(error_log_path, 'w', encoding='utf-8') as error_file:
+        json.dump(error_log, error_file, indent=4)
+    print(f"Logged errors to {error_log_path}")
+    return error_log_path
+
 def update_game_date_in_mongodb(db, team_name, game_id, correct_date):
     """Update the game date in MongoDB with the correct date."""
     collection = db[team_name]
     result = collection.update_one(
         {"games.game.id": game_id},
-        {"$set": {"games.$.game.date.date": correct_date}}
+        stamp_modified({"$set": {"games.$.game.date.date": correct_date}})
     )
     if result.modified_count > 0:
         print(f"Updated game ID {game_id} in MongoDB with the correct date: {correct_date}")
     else:
         print(f"Failed to update the game ID {game_id} in MongoDB.")
 
-def find_game_by_date(db, team_name, game_date):
-    """Find a game by date, also checking the day before and after."""
+DATE_OFFSETS = (0, -1, 1)  # Exact date first, then the day before, then the day after
+GAME_UPDATE_BATCH_SIZE = 500
+
+class GameUpdateQueue:
+    """Per-game $set fields (date fixes, stage/week) collected per team collection.
+
+    Fields queued for the same game are merged, so each game gets one update, and each
+    collection is written with one bulk_write per batch.
+    """
+
+    def __init__(self):
+        self.pending = {}  # team_name -> {game_id: {field under the game entry: value}}
+
+    def add(self, team_name, game_id, fields):
+        self.pending.setdefault(team_name, {}).setdefault(game_id, {}).update(fields)
+
+    def __len__(self):
+        return sum(len(games) for games in self.pending.values())
+
+    def flush(self, db, batch_size=GAME_UPDATE_BATCH_SIZE):
+        """Write every queued update and empty the queue. Returns the number of games modified."""
+        modified = 0
+        for team_name, games in self.pending.items():
+            operations = [
+                UpdateOne(
+                    {"games.game.id": game_id},
+                    stamp_modified({"$set": {f"games.$[g].{field}": value for field, value in fields.items()}}),
+                    array_filters=[{"g.game.id": game_id}]
+                )
+                for game_id, fields in games.items()
+            ]
+            for start in range(0, len(operations), batch_size):
+                modified += db[team_name].bulk_write(operations[start:start + batch_size], ordered=False).modified_count
+            print(f"Flushed {len(operations)} game updates to {team_name}.")
+        self.pending = {}
+        return modified
+
+def load_date_maps(db, team_name, year):
+    """Fetch a team's year and year-1 season documents in one query; season -> {date: game}."""
+    seasons = [str(year), str(year - 1)]
+    date_maps = {}
+    for document in db[team_name].find({"parameters.season": {"$in": seasons}}, {"parameters.season": 1, "games": 1}):
+        season = document["parameters"]["season"]
+        if season in date_maps:
+            continue  # Only the first document per season was ever searched
+        dates = {}
+        for game in document.get("games", []):
+            dates.setdefault(game["game"]["date"]["date"], game)
+        date_maps[season] = dates
+    return date_maps
+
+def match_game_by_date(date_maps, year, game_date):
+    """Find the game for game_date in season year, then year-1, allowing one day either way.
+
+    Returns (game, season, offset in days) or (None, None, None).
+    """
+    day = datetime.strptime(game_date, "%Y-%m-%d")
+    for season in (year, year - 1):
+        dates = date_maps.get(str(season))
+        if dates is None:
+            continue
+        for offset in DATE_OFFSETS:
+            game = dates.get((day + timedelta(days=offset)).strftime("%Y-%m-%d"))
+            if game:
+                return game, season, offset
+    return None, None, None
+
+def find_game_by_date(db, team_name, game_date, updates=None, date_maps=None):
+    """Find a game by date, also checking the day before and after. Returns (game, season) or (None, None).
+
+    Off-by-one matches queue a date correction on `updates` (a GameUpdateQueue) for the caller to
+    flush; without a queue the correction is written straight away. Pass a dict as `date_maps` to reuse fetched
+    season documents across lookups.
+    """
     year = int(game_date.split("-")[0])
-    collection = db[team_name]
+    key = (team_name, year)
+    if date_maps is None:
+        date_maps = {}
+    if key not in date_maps:
+        date_maps[key] = load_date_maps(db, team_name, year)
 
-    # Attempt to find the game on the exact date
-    document = collection.find_one({"parameters.season": str(year)})
-    
-    if document:
-        print(f"Searching for game on the exact date: {game_date}")
-        game = next((g for g in document["games"] if g["game"]["date"]["date"] == game_date), None)
-        if game:
-            return game, year
-
-        # Try the day before
-        previous_day = (datetime.strptime(game_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-        print(f"Checking day -1: {previous_day}")
-        game = next((g for g in document["games"] if g["game"]["date"]["date"] == previous_day), None)
-        if game:
-            update_game_date_in_mongodb(db, team_name, game["game"]["id"], previous_day)
-            return game, year
-
-        # Try the day after
-        next_day = (datetime.strptime(game_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-        print(f"Checking day +1: {next_day}")
-        game = next((g for g in document["games"] if g["game"]["date"]["date"] == next_day), None)
-        if game:
-            update_game_date_in_mongodb(db, team_name, game["game"]["id"], next_day)
-            return game, year
-
-    # If not found, try the previous year (for post-season logic)
-    document = collection.find_one({"parameters.season": str(year - 1)})
-    
-    if document:
-        print(f"Searching for game in the previous year on the exact date: {game_date}")
-        game = next((g for g in document["games"] if g["game"]["date"]["date"] == game_date), None)
-        if game:
-            return game, year - 1
-
-        # Try the day before
-        previous_day = (datetime.strptime(game_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-        print(f"Checking day -1 in previous year: {previous_day}")
-        game = next((g for g in document["games"] if g["game"]["date"]["date"] == previous_day), None)
-        if game:
-            update_game_date_in_mongodb(db, team_name, game["game"]["id"], previous_day)
-            return game, year - 1
-
-        # Try the day after
-        next_day = (datetime.strptime(game_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-        print(f"Checking day +1 in previous year: {next_day}")
-        game = next((g for g in document["games"] if g["game"]["date"]["date"] == next_day), None)
-        if game:
-            update_game_date_in_mongodb(db, team_name, game["game"]["id"], next_day)
-            return game, year - 1
-
-    print(f"No game found for team {team_name} on date {game_date} in year {year} or {year - 1}")
-    return None, None
-
-def update_game_stage_and_week(db, team_name, game, game_date, season):
-    """Update stage and week fields if they are null, and correct the date if necessary."""
-    if game["game"]["stage"] is None and game["game"]["week"] is None:
-        json_file_path = os.path.join("games_by_year_data", f"games_in_{season}.json")
+    game, season, offset = match_game_by_date(date_maps[key], year, game_date)
+    if game is None:
+        print(f"No game found for team {team_name} on date {game_date} in year {year} or {year - 1}")
+        return None, None
+
+    if offset:
+        print(f"Matched game ID {game['game']['id']} on day {offset:+d}; queueing date correction to {game_date}.")
+        queue = updates if updates is not None else GameUpdateQueue()
+        queue.add(team_name, game["game"]["id"], {"game.date.date": game_date})
+        if updates is None:
+            queue.flush(db)
+    return game, season
+
+_season_lookups = {}  # season file path -> (mtime_ns, lookup)
+_season_lookups_lock = threading.Lock()
+
+def build_season_lookup(games_data):
+    """Index a season's JSON games by (date, home_team) and (date, visitor_team), keeping file positions."""
+    lookup = {"by_home": {}, "by_visitor": {}}
+    for position, game in enumerate(games_data):
+        game_date = game.get("game_date")
+        lookup["by_home"].setdefault((game_date, game.get("home_team")), (position, game))
+        lookup["by_visitor"].setdefault((game_date, game.get("visitor_team")), (position, game))
+    return lookup
+
+def get_season_lookup(season, games_dir=GAMES_DIR):
+    """Shared lookup for a season file, rebuilt only when the file changes (by mtime). None if there is no file."""
+    path = find_season_file(season, games_dir)
+    if path is None:
+        return None
+    mtime = os.stat(path).st_mtime_ns
+    with _season_lookups_lock:
+        cached = _season_lookups.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    lookup = build_season_lookup(load_season(season, games_dir))
+    with _season_lookups_lock:
+        _season_lookups[path] = (mtime, lookup)
+    return lookup
 
-        if not os.path.exists(json_file_path):
-            json_file_path = os.path.join("games_by_year_data", f"games_in_{season - 1}.json")
+def match_json_game(lookup, game_date, home_team, away_team):
+    """The first JSON game on game_date whose home or visitor team matches, as the old file-order scan found it."""
+    matches = [
+        match for match in (lookup["by_home"].get((game_date, home_team)), lookup["by_visitor"].get((game_date, away_team)))
+        if match
+    ]
+    return min(matches, key=lambda match: match[0])[1] if matches else None
 
-        if os.path.exists(json_file_path):
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                games_data = json.load(f)
+def update_game_stage_and_week(db, team_name, game, game_date, season, updates=None):
+    """Update stage and week fields if they are null, and correct the date if necessary.
 
-            matching_game = next((g for g in games_data if g["game_date"] == game_date and (
-                g.get("home_team") == game["teams"]["home"]["name"] or 
-                g.get("visitor_team") == game["teams"]["away"]["name"]
-            )), None)
+    The date fix and the stage/week $set go out as one update. Pass a GameUpdateQueue as `updates`
+    to batch them with other games; without one the update is written straight away.
+    """
+    if game["game"]["stage"] is None and game["game"]["week"] is None:
+        source_season = season if season_exists(season) else season - 1
+        lookup = get_season_lookup(source_season)
+
+        if lookup is not None:
+            matching_game = match_json_game(lookup, game_date, game["teams"]["home"]["name"], game["teams"]["away"]["name"])
 
             if matching_game:
                 print(f"Found matching game in JSON file: {matching_game}")
                 game["game"]["stage"] = matching_game["stage"]
                 game["game"]["week"] = matching_game["week_num"]
+                fields = {"game.stage": matching_game["stage"], "game.week": matching_game["week_num"]}
 
-                # If the date is off by a day, correct it in MongoDB
+                # If the date is off by a day, correct it in the same update
                 if game["game"]["date"]["date"] != matching_game["game_date"]:
                     print(f"Updating correct date to MongoDB: {matching_game['game_date']}")
-                    update_game_date_in_mongodb(db, team_name, game["game"]["id"], matching_game["game_date"])
+                    fields["game.date.date"] = matching_game["game_date"]
 
-                # Update the stage and week in MongoDB
-                collection = db[team_name]
-                result = collection.update_one(
-                    {"games.game.id": game["game"]["id"]},
-                    {"$set": {"games.$.game.stage": matching_game["stage"], "games.$.game.week": matching_game["week_num"]}}
-                )
-                print(f"Update result: {result.modified_count} documents modified.")
-                if result.modified_count > 0:
-                    print(f"Updated game in MongoDB with stage: {matching_game['stage']} and week: {matching_game['week_num']}")
-                else:
-                    print("Failed to update the game in MongoDB.")
+                queue = updates if updates is not None else GameUpdateQueue()
+                queue.add(team_name, game["game"]["id"], fields)
+                if updates is None:
+                    modified = queue.flush(db)
+                    if modified > 0:
+                        print(f"Updated game in MongoDB with stage: {matching_game['stage']} and week: {matching_game['week_num']}")
+                    else:
+                        print("Failed to update the game in MongoDB.")
         else:
-            print(f"JSON file not found: {json_file_path}")
+            print(f"JSON file not found: {season_path(source_season)}")
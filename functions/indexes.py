@@ -0,0 +1,143 @@
+# functions/indexes.py
+# Indexes for the filters the scrub steps run against every team collection, plus explain() reporting.
+from pymongo import ASCENDING
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+from .data_check import MISSING_DATA_PIPELINE
+from .normalize_week_fields import BARE_WEEK_FILTER, COUNT_BARE_WEEKS_PIPELINE
+from .mongo_bleach import BLEACH_PIPELINE
+from .export_parquet import signature_pipeline, sources_pipeline
+from .game_store import GAME_STORE_DB, get_game_store, ensure_game_store_indexes
+
+# Index name -> keys. Everything under games.* is multikey (one entry per game in the season document).
+TEAM_COLLECTION_INDEXES = {
+    "season_team": [("parameters.season", ASCENDING), ("parameters.team", ASCENDING)],
+    "game_id": [("games.game.id", ASCENDING)],
+    "game_stage": [("games.game.stage", ASCENDING)],
+    "game_week": [("games.game.week", ASCENDING)],
+    "season_updated": [("parameters.season", ASCENDING), ("parameters.updated_at", ASCENDING)],
+}
+
+def ensure_collection_indexes(collection):
+    """Create whichever scrub indexes a collection is missing. Returns the names created."""
+    existing_keys = [list(info["key"]) for info in collection.index_information().values()]
+    created = []
+    for name, keys in TEAM_COLLECTION_INDEXES.items():
+        if keys in existing_keys:
+            continue
+        collection.create_index(keys, name=name)
+        created.append(name)
+    return created
+
+def ensure_indexes(db, collection_names, verbose=True):
+    """Make sure every team collection has the scrub indexes. Returns {collection_name: [created index names]}."""
+    created = {}
+    for collection_name in collection_names:
+        names = ensure_collection_indexes(db[collection_name])
+        if names:
+            created[collection_name] = names
+            print(f"✅ {collection_name}: created {', '.join(names)}.")
+        elif verbose:
+            print(f"➖ {collection_name}: indexes already in place.")
+    return created
+
+def scrub_queries(collection):
+    """(label, kind, filter or pipeline) for each query the scrub steps and the export send.
+
+    Aggregations are the real pipelines; update filters use a real season and game ID from the collection.
+    """
+    sample = collection.find_one({}, {"parameters.season": 1, "games.game.id": 1}) or {}
+    document_id = sample.get("_id")
+    season = sample.get("parameters", {}).get("season", "2010")
+    game_id = next((game["game"]["id"] for game in sample.get("games", [])), 0)
+    return [
+        ("bleach", "aggregate", BLEACH_PIPELINE),
+        ("data check", "aggregate", MISSING_DATA_PIPELINE),
+        ("count bare weeks", "aggregate", COUNT_BARE_WEEKS_PIPELINE),
+        ("export signature", "aggregate", signature_pipeline()),
+        ("export sources", "aggregate", sources_pipeline(season)),
+        ("season document", "find", {"parameters.season": season}),
+        ("update by game id", "find", {"games.game.id": game_id}),
+        ("bleach update", "find", {"_id": document_id, "games.game.id": game_id}),
+        ("bare weeks update", "find", BARE_WEEK_FILTER),
+    ]
+
+def plan_stages(plan):
+    """Flatten a winning plan into its stage names, outermost first, with the indexes it used."""
+    plan = plan.get("queryPlan", plan)  # Slot-based engine wraps the classic plan
+    stages, index_names = [plan.get("stage")], []
+    if plan.get("indexName"):
+        index_names.append(plan["indexName"])
+    for child in [plan["inputStage"]] if "inputStage" in plan else plan.get("inputStages", []):
+        child_stages, child_indexes = plan_stages(child)
+        stages += child_stages
+        index_names += child_indexes
+    return stages, index_names
+
+def aggregate_query_planner(explain):
+    """The queryPlanner section of an aggregate explain, whether or not the whole pipeline was pushed down."""
+    if "queryPlanner" in explain:
+        return explain["queryPlanner"]
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            return stage["$cursor"]["queryPlanner"]
+    return {"winningPlan": {}}
+
+def explain_query(collection, kind, query):
+    """Summarize explain for one find filter or aggregation pipeline: plan stages, indexes used and keys/docs examined."""
+    if kind == "aggregate":
+        explain = collection.database.command("aggregate", collection.name, pipeline=query, explain=True)
+        planner = aggregate_query_planner(explain)
+    else:
+        explain = collection.find(query).explain()
+        planner = explain["queryPlanner"]
+    stages, index_names = plan_stages(planner["winningPlan"])
+    stats = explain.get("executionStats", {})
+    return {
+        "plan": ">".join(stage for stage in stages if stage),
+        "indexes": sorted(set(index_names)),
+        "collscan": "COLLSCAN" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+    }
+
+def report_query_plans(db, collection_names):
+    """Print explain stats for every scrub query in every collection. Returns the number of COLLSCANs."""
+    print(f"{'collection':<24}{'query':<20}{'plan':<28}{'index':<16}{'keys':>7}{'docs':>7}{'rows':>7}")
+    collscans = 0
+    for collection_name in collection_names:
+        collection = db[collection_name]
+        for label, kind, query in scrub_queries(collection):
+            summary = explain_query(collection, kind, query)
+            collscans += summary["collscan"]
+            flag = " ⚠️" if summary["collscan"] else ""
+            # aggregate explain only reports the plan, not execution stats
+            counts = "".join(f"{'-' if count is None else count:>7}" for count in (summary["keys_examined"], summary["docs_examined"], summary["returned"]))
+            print(f"{collection_name:<24}{label:<20}{summary['plan']:<28}{','.join(summary['indexes']) or '-':<16}{counts}{flag}")
+    if collscans:
+        print(f"❌ {collscans} scrub queries still do a COLLSCAN.")
+    else:
+        print("✅ No scrub query does a COLLSCAN.")
+    return collscans
+
+def ensure_indexes_command(collection_names=None, explain=True):
+    """`main.py ensure_indexes`: create missing indexes (team collections and, if present, the game store) and report plans.
+
+    Returns the number of scrub queries that still do a COLLSCAN (0 when explain is off).
+    """
+    client = get_mongo_client()
+    try:
+        db = get_database(client)
+        collection_names = collection_names or db.list_collection_names()
+        ensure_indexes(db, collection_names)
+        if GAME_STORE_DB in client.list_database_names():
+            ensure_game_store_indexes(get_game_store(client))
+            print("✅ Game store indexes in place.")
+        if explain:
+            return report_query_plans(db, collection_names)
+        return 0
+    finally:
+        release_mongo_client(client)
+
+if __name__ == "__main__":
+    raise SystemExit(1 if ensure_indexes_command() else 0)
@@ -1,7 +1,12 @@
-import os
 import json
 from datetime import datetime
-from modules.connection_module import get_mongo_client, get_database
+from functools import lru_cache
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+from modules.season_store import GAMES_DIR, find_season_file, load_season
+from pymongo import UpdateOne
+from .update_stage_week_and_date import flush_game_updates, DEFAULT_BATCH_SIZE
+from .game_utils import game_fingerprint, stamp_modified, write_error_log
+from .data_check import MISSING_GAME_FILTER
 
 def normalize_team_name(name):
     """Normalize team names to match MongoDB collection names."""
@@ -9,7 +14,115 @@ def normalize_team_name(name):
     name = name.replace("49Ers", "49ers")
     return name.replace(" ", "_")
 
-def mongo_bleach():
+# Only season documents with a game missing stage/week are unwound; the indexed $match runs first
+BLEACH_PIPELINE = [
+    {"$match": MISSING_GAME_FILTER},
+    {"$unwind": "$games"},
+    {"$match": MISSING_GAME_FILTER},
+]
+
+SEASON_CACHE_SIZE = 4  # Parsed season files kept in memory at once
+
+def load_season_games_by_id(games_dir, season):
+    """Parse a season file once and index its games by game_id (None if the file is missing)."""
+    if find_season_file(season, games_dir) is None:
+        return None
+
+    return index_games_by_id(load_season(season, games_dir))
+
+def index_games_by_id(games_data):
+    """Index a season's games by game_id."""
+    games_by_id = {}
+    for game in games_data:
+        game_id = game.get("game_id")
+        if game_id is None:
+            continue
+        # Prefer the first entry that can actually be used for the update
+        existing = games_by_id.get(game_id)
+        if existing is None or not (existing.get("winner_id") and existing.get("loser_id")):
+            games_by_id[game_id] = game
+    return games_by_id
+
+def bleach_set(game, team_id_to_logo):
+    """Build the positional $set that copies a JSON game's stage/week/date, names and logos onto MongoDB."""
+    winner_id = game["winner_id"]
+    loser_id = game["loser_id"]
+    return {
+        "games.$.game.stage": game.get("stage"),
+        "games.$.game.week": game.get("week_num"),
+        "games.$.game.date.date": game.get("game_date"),
+        "games.$.teams.home.name": game["winner"] if winner_id == game["winner_id"] else game["loser"],
+        "games.$.teams.away.name": game["loser"] if winner_id == game["winner_id"] else game["winner"],
+        "games.$.teams.home.logo": team_id_to_logo.get(winner_id) if winner_id == game["winner_id"] else team_id_to_logo.get(loser_id),
+        "games.$.teams.away.logo": team_id_to_logo.get(loser_id) if winner_id == game["winner_id"] else team_id_to_logo.get(winner_id),
+        "games.$.game.fingerprint": game_fingerprint(game, team_id_to_logo),
+    }
+
+def bleach_collection(collection, season_games, team_id_to_collection_name, team_id_to_logo, bulk=False, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Fill missing stage/week games in one collection from season_games(season) -> {game_id: game}. Returns games updated."""
+    updated_games_count = 0
+    operations = []
+    cursor = collection.aggregate(BLEACH_PIPELINE)
+
+    for result in cursor:
+        game_id = result["games"]["game"]["id"]
+        season = result["games"]["league"]["season"]
+
+        try:
+            # Find the corresponding game in the JSON files
+            games_by_id = season_games(season)
+            if games_by_id is None:
+                print(f"JSON file for season {season} not found.")
+                continue
+
+            game = games_by_id.get(game_id)
+            if game is None:
+                continue
+
+            winner_id = game.get("winner_id")
+            loser_id = game.get("loser_id")
+
+            if not winner_id or not loser_id:
+                print(f"Skipping game due to missing winner_id or loser_id on {game['game_date']}.")
+                continue
+
+            # Determine the collection name based on the winner's team ID
+            correct_collection_name = team_id_to_collection_name.get(winner_id)
+            if not correct_collection_name:
+                print(f"Could not find collection name for winner_id: {winner_id}")
+                continue
+
+            # MongoDB already holds exactly what we would write
+            if not force and result["games"]["game"].get("fingerprint") == game_fingerprint(game, team_id_to_logo):
+                continue
+
+            update_filter = {"_id": result["_id"], "games.game.id": game_id}
+            update = stamp_modified({"$set": bleach_set(game, team_id_to_logo)})
+            if bulk:
+                operations.append(UpdateOne(update_filter, update))
+                continue
+
+            # Update the game data in MongoDB
+            update_result = collection.update_one(update_filter, update)
+
+            if update_result.modified_count > 0:
+                print(f"Updated Game ID {game_id} in collection {collection.name}.")
+                updated_games_count += 1
+
+        except FileNotFoundError:
+            print(f"Error: File for season {season} not found.")
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON for season {season}: {e}")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    if operations:
+        matched, modified = flush_game_updates(collection, operations, batch_size)
+        print(f"✅ {collection.name}: {matched} games matched, {modified} games bleached.")
+        updated_games_count += modified
+    return updated_games_count
+
+def mongo_bleach(season_cache_size=SEASON_CACHE_SIZE, force=False):
     # Load team data from teams.json
     try:
         with open("data/teams.json", 'r', encoding='utf-8') as f:
@@ -31,88 +144,26 @@ def mongo_bleach():
     client = get_mongo_client()
     db = get_database(client)
 
-    games_dir = "games_by_year_data"
+    games_dir = GAMES_DIR
     error_log = []
     updated_games_count = 0
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
+    # Run-scoped LRU over seasons so each file is parsed once per run, not once per game
+    season_games = lru_cache(maxsize=season_cache_size)(lambda season: load_season_games_by_id(games_dir, season))
+
     # Query MongoDB for all games with missing stage or week data
     print("Searching for games with missing stage or week data...")
     for collection_name in db.list_collection_names():
-        collection = db[collection_name]
-        cursor = collection.aggregate([
-            {"$unwind": "$games"},
-            {"$match": {"$or": [{"games.game.stage": None}, {"games.game.week": None}]}}
-        ])
-        
-        for result in cursor:
-            game_id = result["games"]["game"]["id"]
-            season = result["games"]["league"]["season"]
-
-            # Find the corresponding game in the JSON files
-            json_file_path = os.path.join(games_dir, f"games_in_{season}.json")
-            if not os.path.exists(json_file_path):
-                print(f"JSON file for season {season} not found.")
-                continue
-
-            try:
-                with open(json_file_path, 'r', encoding='utf-8') as f:
-                    games_data = json.load(f)
-
-                for game in games_data:
-                    if game.get("game_id") == game_id:
-                        winner_id = game.get("winner_id")
-                        loser_id = game.get("loser_id")
-
-                        if not winner_id or not loser_id:
-                            print(f"Skipping game due to missing winner_id or loser_id on {game['game_date']}.")
-                            continue
-
-                        # Determine the collection name based on the winner's team ID
-                        correct_collection_name = team_id_to_collection_name.get(winner_id)
-                        if not correct_collection_name:
-                            print(f"Could not find collection name for winner_id: {winner_id}")
-                            continue
-
-                        
-                        # Update the game data in MongoDB
-                        update_result = collection.update_one(
-                            {"_id": result["_id"], "games.game.id": game_id},
-                            {"$set": {
-                                "games.$.game.stage": game.get("stage"),
-                                "games.$.game.week": game.get("week_num"),
-                                "games.$.game.date.date": game.get("game_date"),
-                                "games.$.teams.home.name": game["winner"] if winner_id == game["winner_id"] else game["loser"],
-                                "games.$.teams.away.name": game["loser"] if winner_id == game["winner_id"] else game["winner"],
-                                "games.$.teams.home.logo": team_id_to_logo.get(winner_id) if winner_id == game["winner_id"] else team_id_to_logo.get(loser_id),
-                                "games.$.teams.away.logo": team_id_to_logo.get(loser_id) if winner_id == game["winner_id"] else team_id_to_logo.get(winner_id),
-                            }}
-                        )
-
-                        if update_result.modified_count > 0:
-                            print(f"Updated Game ID {game_id} in collection {collection_name}.")
-                            updated_games_count += 1
-                        break
-
-            except FileNotFoundError:
-                print(f"Error: File {json_file_path} not found.")
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON in file {json_file_path}: {e}")
-            except Exception as e:
-                print(f"An error occurred: {e}")
+        updated_games_count += bleach_collection(db[collection_name], season_games, team_id_to_collection_name, team_id_to_logo, force=force)
 
     # Log any errors to a JSON file in the test_responses directory
-    if error_log:
-        os.makedirs("test_responses", exist_ok=True)
-        error_log_path = os.path.join("test_responses", f"id_errors_{timestamp}.json")
-        with open(error_log_path, 'w', encoding='utf-8') as error_file:
-            json.dump(error_log, error_file, indent=4)
-        print(f"Logged errors to {error_log_path}")
+    write_error_log(error_log, timestamp)
 
     print(f"Total games updated in MongoDB: {updated_games_count}")
 
     # Close the MongoDB client after processing all files
-    client.close()
+    release_mongo_client(client)
 
 # Example usage
 if __name__ == "__main__":
@@ -1,43 +1,109 @@
 # scripts/normalize_week_labels.py
-from modules.connection_module import get_mongo_client, get_database
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
 from pymongo import UpdateOne
+from .game_utils import stamp_modified
 
-def normalize_week_fields():
+# A week that still needs the prefix: an integer, or a string of digits (e.g. 3 or "3")
+BARE_WEEK_FILTER = {"$or": [
+    {"games.game.week": {"$type": "int"}},
+    {"games.game.week": {"$type": "long"}},
+    {"games.game.week": {"$regex": "^[0-9]+$"}},
+]}
+
+# Aggregation-pipeline update that rewrites only the bare weeks inside the games array, on the server
+PREFIX_WEEKS_UPDATE = [
+    {"$set": {"games": {"$map": {
+        "input": "$games",
+        "as": "g",
+        "in": {"$cond": [
+            {"$or": [
+                {"$in": [{"$type": "$$g.game.week"}, ["int", "long"]]},
+                {"$and": [
+                    {"$eq": [{"$type": "$$g.game.week"}, "string"]},
+                    {"$regexMatch": {"input": "$$g.game.week", "regex": "^[0-9]+$"}},
+                ]},
+            ]},
+            {"$mergeObjects": ["$$g", {"game": {"$mergeObjects": [
+                "$$g.game",
+                {"week": {"$concat": ["Week ", {"$toString": "$$g.game.week"}]}},
+            ]}}]},
+            "$$g",
+        ]},
+    }}}},
+]
+
+# Dry run: count games whose week still needs the prefix, reading only the week field
+COUNT_BARE_WEEKS_PIPELINE = [
+    {"$match": BARE_WEEK_FILTER},
+    {"$project": {"_id": 0, "games.game.week": 1}},
+    {"$unwind": "$games"},
+    {"$match": BARE_WEEK_FILTER},
+    {"$count": "games"},
+]
+
+def count_bare_weeks(collection):
+    """Dry run: count games whose week still needs the prefix, reading only the week field."""
+    result = list(collection.aggregate(COUNT_BARE_WEEKS_PIPELINE))
+    return result[0]["games"] if result else 0
+
+def normalize_collection_weeks_server_side(collection, dry_run=False):
+    """Prefix bare week numbers inside MongoDB, without sending games arrays either way."""
+    collection_name = collection.name
+    games = count_bare_weeks(collection)
+    if dry_run or games == 0:
+        label = "would be normalized" if dry_run else "normalized"
+        print(f"{'🔎' if dry_run else '➖'} {collection_name}: {games} week values {label}.")
+        return games
+
+    result = collection.update_many(BARE_WEEK_FILTER, stamp_modified(PREFIX_WEEKS_UPDATE))
+    print(f"✅ {collection_name}: {games} week values normalized in {result.modified_count} documents.")
+    return result.modified_count
+
+def normalize_collection_weeks(collection, server_side=False, dry_run=False):
+    """Prefix bare week numbers with 'Week ' in one collection. Returns documents modified (games found, on a dry run)."""
+    if server_side or dry_run:
+        return normalize_collection_weeks_server_side(collection, dry_run)
+
+    collection_name = collection.name
+    print(f"🔍 Scanning collection: {collection_name}")
+
+    bulk_updates = []
+
+    for doc in collection.find({"games.game.week": {"$exists": True}}):
+        updated = False
+        for i, game in enumerate(doc.get("games", [])):
+            week = game.get("game", {}).get("week")
+            if week is None:
+                continue
+
+            # Normalize if it's an int or string number (e.g. 3 or "3")
+            if (isinstance(week, int) or (isinstance(week, str) and week.isdigit())):
+                doc["games"][i]["game"]["week"] = f"Week {week}"
+                updated = True
+
+        if updated:
+            bulk_updates.append(
+                UpdateOne({"_id": doc["_id"]}, stamp_modified({"$set": {"games": doc["games"]}}))
+            )
+
+    if bulk_updates:
+        result = collection.bulk_write(bulk_updates)
+        print(f"✅ {collection_name}: {result.modified_count} week values normalized.")
+        return result.modified_count
+
+    print(f"➖ {collection_name}: no changes needed.")
+    return 0
+
+def normalize_week_fields(server_side=False, dry_run=False):
     client = get_mongo_client()
     db = get_database(client)
 
     collections = db.list_collection_names()
 
     for collection_name in collections:
-        collection = db[collection_name]
-        print(f"🔍 Scanning collection: {collection_name}")
-
-        bulk_updates = []
-
-        for doc in collection.find({"games.game.week": {"$exists": True}}):
-            updated = False
-            for i, game in enumerate(doc.get("games", [])):
-                week = game.get("game", {}).get("week")
-                if week is None:
-                    continue
-
-                # Normalize if it's an int or string number (e.g. 3 or "3")
-                if (isinstance(week, int) or (isinstance(week, str) and week.isdigit())):
-                    doc["games"][i]["game"]["week"] = f"Week {week}"
-                    updated = True
-
-            if updated:
-                bulk_updates.append(
-                    UpdateOne({"_id": doc["_id"]}, {"$set": {"games": doc["games"]}})
-                )
-
-        if bulk_updates:
-            result = collection.bulk_write(bulk_updates)
-            print(f"✅ {collection_name}: {result.modified_count} week values normalized.")
-        else:
-            print(f"➖ {collection_name}: no changes needed.")
-
-    client.close()
+        normalize_collection_weeks(db[collection_name], server_side, dry_run)
+
+    release_mongo_client(client)
     print("🎉 Done normalizing week fields.")
 
 if __name__ == "__main__":
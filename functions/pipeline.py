@@ -0,0 +1,200 @@
+# functions/pipeline.py
+import json
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+from modules.season_store import GAMES_DIR, list_seasons, load_season, save_season
+from modules.profiling import phase
+from .assign_team_ids_and_update_json import assign_team_ids
+from .columnar import assign_team_ids_columnar
+from .fetch_game_ids import assign_game_ids, build_team_id_to_name
+from .game_utils import write_error_log
+from .update_stage_week_and_date import normalize_team_name, game_collection_name, bulk_update_stage_week_and_date, DEFAULT_BATCH_SIZE
+from .mongo_bleach import index_games_by_id, bleach_collection
+from .normalize_week_fields import normalize_collection_weeks
+from .async_scrub import run_over_collections
+from .indexes import ensure_indexes
+from .game_store import GAMES_COLLECTION, ensure_game_store_indexes, get_game_store, prepare_game_store, update_game_store, normalize_store_weeks, sync_team_collections
+
+class ScrubContext:
+    """State shared by every pipeline stage: one client, one teams map and the in-memory season records."""
+
+    def __init__(self, db, teams, games_dir=GAMES_DIR, batch_size=DEFAULT_BATCH_SIZE, concurrency=1, force=False, engine="python", game_store=None):
+        self.db = db
+        self.team_name_to_id = teams["team_name_to_id"]
+        self.team_id_to_name = teams["team_id_to_name"]
+        self.team_id_to_collection_name = teams["team_id_to_collection_name"]
+        self.team_id_to_logo = teams["team_id_to_logo"]
+        self.games_dir = games_dir
+        self.batch_size = batch_size
+        self.concurrency = concurrency  # Collections worked on at once by the MongoDB stages
+        self.force = force  # Write games even when their fingerprint says nothing changed
+        self.engine = engine  # "python" or "columnar" (pandas) for the JSON-side team ID pass
+        self.game_store = game_store  # games collection of the normalized store, or None for team collections only
+        self._seasons = None
+        self.error_log = []
+        self.dirty_seasons = set()
+        self._collection_names = None
+
+    @property
+    def seasons(self):
+        """season -> list of games, as stored in games_in_{season}; loaded on first use."""
+        if self._seasons is None:
+            self._seasons = {}
+            for season in list_seasons(self.games_dir):
+                try:
+                    self._seasons[season] = load_season(season, self.games_dir)
+                    print(f"Loaded games_in_{season}: {len(self._seasons[season])} games found.")
+                except json.JSONDecodeError as e:
+                    print(f"Error decoding JSON in games_in_{season}: {e}")
+        return self._seasons
+
+    def collection_names(self):
+        if self._collection_names is None:
+            self._collection_names = self.db.list_collection_names()
+        return self._collection_names
+
+def load_teams(path="data/teams.json"):
+    """Read teams.json once and build every lookup the scrub steps need."""
+    with open(path, 'r', encoding='utf-8') as f:
+        teams = json.load(f)
+
+    teams_list = teams["response"] if isinstance(teams, dict) and "response" in teams else teams
+    if not isinstance(teams_list, list):
+        raise ValueError("teams.json is not in the expected format.")
+
+    print(f"Successfully loaded teams.json: {len(teams_list)} teams found.")
+    team_name_to_id = {team["name"]: team["id"] for team in teams_list}
+    return {
+        "team_name_to_id": team_name_to_id,
+        "team_id_to_name": build_team_id_to_name(team_name_to_id),
+        "team_id_to_collection_name": {team["id"]: normalize_team_name(team["name"]) for team in teams_list},
+        "team_id_to_logo": {team["id"]: team["logo"] for team in teams_list},
+    }
+
+def stage_assign_team_ids(ctx):
+    if ctx.engine == "columnar":
+        assign_team_ids_columnar(ctx.seasons, ctx.team_name_to_id)
+        ctx.dirty_seasons.update(ctx.seasons)
+        return
+
+    for season, games_data in ctx.seasons.items():
+        assign_team_ids(games_data, season, ctx.team_name_to_id)
+        ctx.dirty_seasons.add(season)
+
+def stage_fetch_game_ids(ctx):
+    season_indexes = {}
+    for season, games_data in ctx.seasons.items():
+        assign_game_ids(ctx.db, games_data, season, ctx.team_id_to_name, season_indexes, ctx.error_log)
+        ctx.dirty_seasons.add(season)
+
+def stage_update_stage_week_and_date(ctx):
+    loaded_fingerprints = {season: [game.get("fingerprint") for game in games_data] for season, games_data in ctx.seasons.items()}
+    games_by_collection = {}
+    for games_data in ctx.seasons.values():
+        for game in games_data:
+            collection_name = game_collection_name(game, ctx.team_id_to_collection_name)
+            if collection_name:
+                games_by_collection.setdefault(collection_name, []).append(game)
+
+    if ctx.game_store is not None:
+        games = [game for games_data in ctx.seasons.values() for game in games_data]
+        updated, errors = update_game_store(ctx.game_store, games, ctx.team_id_to_logo, ctx.batch_size, ctx.force)
+        results = {GAMES_COLLECTION: (updated, errors)}
+    else:
+        results = run_over_collections(
+            games_by_collection,
+            lambda name: bulk_update_stage_week_and_date(ctx.db, {name: games_by_collection[name]}, ctx.team_id_to_logo, ctx.batch_size, ctx.force),
+            ctx.concurrency
+        )
+    updated = 0
+    for collection_updated, errors in results.values():
+        updated += collection_updated
+        ctx.error_log.extend(errors)
+    print(f"Total games updated in MongoDB: {updated}")
+
+    for season, games_data in ctx.seasons.items():
+        if [game.get("fingerprint") for game in games_data] != loaded_fingerprints[season]:
+            ctx.dirty_seasons.add(season)
+
+def stage_mongo_bleach(ctx):
+    if ctx.game_store is not None:
+        print("➖ Game store: both team copies are rewritten by the sync stage, nothing to bleach.")
+        return
+
+    games_by_season = {str(season): index_games_by_id(games_data) for season, games_data in ctx.seasons.items()}
+    results = run_over_collections(
+        ctx.collection_names(),
+        lambda name: bleach_collection(
+            ctx.db[name], games_by_season.get, ctx.team_id_to_collection_name, ctx.team_id_to_logo,
+            bulk=True, batch_size=ctx.batch_size, force=ctx.force
+        ),
+        ctx.concurrency
+    )
+    updated = sum(results.values())
+    print(f"Total games updated in MongoDB: {updated}")
+
+def stage_normalize_week_fields(ctx):
+    if ctx.game_store is not None:
+        normalize_store_weeks(ctx.game_store)
+        return
+    run_over_collections(ctx.collection_names(), lambda name: normalize_collection_weeks(ctx.db[name], server_side=True), ctx.concurrency)
+
+def stage_sync_game_store(ctx):
+    if ctx.game_store is None:
+        print("➖ No game store in use, nothing to sync.")
+        return
+    updated = sync_team_collections(ctx.db, ctx.game_store, ctx.batch_size)
+    print(f"Total games updated in MongoDB: {updated}")
+
+STAGES = {
+    "assign_team_ids": ("✅ Assigning team IDs to JSON...", stage_assign_team_ids),
+    "fetch_game_ids": ("✅ Fetching game IDs from MongoDB...", stage_fetch_game_ids),
+    "update_stage_week_and_date": ("✅ Updating stage/week/date fields...", stage_update_stage_week_and_date),
+    "mongo_bleach": ("✅ Final bleach pass...", stage_mongo_bleach),
+    "normalize_week_fields": ("🔧 Normalizing game.week values (adding 'Week ' prefix where needed)...", stage_normalize_week_fields),
+    "sync_game_store": ("🔄 Syncing team collections from the game store...", stage_sync_game_store),
+}
+
+DEFAULT_STAGES = [name for name in STAGES if name != "sync_game_store"]
+
+def run_pipeline(stages=DEFAULT_STAGES, games_dir=GAMES_DIR, batch_size=DEFAULT_BATCH_SIZE, concurrency=1, force=False, engine="python", game_store=False):
+    """Run scrub stages over every season in memory, then write each changed season file once.
+
+    With game_store=True the MongoDB stages write each game once to the normalized store and a
+    final sync stage copies the results out to both team collections.
+    """
+    if game_store and "sync_game_store" not in stages:
+        stages = list(stages) + ["sync_game_store"]
+
+    try:
+        teams = load_teams()
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        print(f"Error loading teams.json: {e}")
+        return
+
+    client = get_mongo_client()
+    try:
+        ctx = ScrubContext(
+            get_database(client), teams, games_dir, batch_size, concurrency, force, engine,
+            get_game_store(client) if game_store else None
+        )
+        print("🔎 Checking indexes...")
+        ensure_indexes(ctx.db, ctx.collection_names(), verbose=False)
+        if ctx.game_store is not None:
+            ensure_game_store_indexes(ctx.game_store)
+            if not prepare_game_store(ctx.db, ctx.game_store, batch_size):
+                return
+
+        for name in stages:
+            message, stage = STAGES[name]
+            print(message)
+            with phase(f"stage:{name}"):
+                stage(ctx)
+
+        for season in sorted(ctx.dirty_seasons):
+            save_season(ctx.seasons[season], season, games_dir)
+            print(f"Updated games_in_{season} and saved changes.")
+
+        write_error_log(ctx.error_log)
+        return ctx
+    finally:
+        release_mongo_client(client)
@@ -0,0 +1,108 @@
+# functions/season_workers.py
+# Run the JSON-side steps one season per process. Seasons are independent: each worker gets the
+# read-only teams maps once, opens its own MongoDB client, and hands back errors/counters to merge.
+import json
+from concurrent.futures import ProcessPoolExecutor
+from modules.connection_module import get_mongo_client, get_database
+from modules.season_store import GAMES_DIR, list_seasons, load_season, save_season
+from .assign_team_ids_and_update_json import assign_team_ids
+from .fetch_game_ids import assign_game_ids
+from .update_stage_week_and_date import game_collection_name, bulk_update_stage_week_and_date, DEFAULT_BATCH_SIZE
+from .pipeline import load_teams
+from .game_utils import write_error_log
+
+_worker = {}  # Per-process state set by init_season_worker
+
+def init_season_worker(teams, games_dir, batch_size, force):
+    _worker.clear()
+    _worker.update(teams=teams, games_dir=games_dir, batch_size=batch_size, force=force, db=None, season_indexes={})
+
+def worker_db():
+    """This process's database handle, connected on first use."""
+    if _worker["db"] is None:
+        _worker["db"] = get_database(get_mongo_client())
+    return _worker["db"]
+
+def season_result(season, saved=False, updated=0, errors=None):
+    return {"season": season, "saved": saved, "updated": updated, "errors": errors or []}
+
+def assign_team_ids_job(season):
+    games_data = load_season(season, _worker["games_dir"])
+    assign_team_ids(games_data, season, _worker["teams"]["team_name_to_id"])
+    save_season(games_data, season, _worker["games_dir"])
+    return season_result(season, saved=True)
+
+def fetch_game_ids_job(season):
+    games_data = load_season(season, _worker["games_dir"])
+    error_log = []
+    assign_game_ids(worker_db(), games_data, season, _worker["teams"]["team_id_to_name"], _worker["season_indexes"], error_log)
+    save_season(games_data, season, _worker["games_dir"])
+    return season_result(season, saved=True, errors=error_log)
+
+def update_stage_week_and_date_job(season):
+    games_data = load_season(season, _worker["games_dir"])
+    loaded_fingerprints = [game.get("fingerprint") for game in games_data]
+    games_by_collection = {}
+    for game in games_data:
+        collection_name = game_collection_name(game, _worker["teams"]["team_id_to_collection_name"])
+        if collection_name:
+            games_by_collection.setdefault(collection_name, []).append(game)
+
+    updated, error_log = bulk_update_stage_week_and_date(
+        worker_db(), games_by_collection, _worker["teams"]["team_id_to_logo"], _worker["batch_size"], _worker["force"]
+    )
+    saved = [game.get("fingerprint") for game in games_data] != loaded_fingerprints
+    if saved:
+        save_season(games_data, season, _worker["games_dir"])
+    return season_result(season, saved=saved, updated=updated, errors=error_log)
+
+SEASON_JOBS = {
+    "assign_team_ids": assign_team_ids_job,
+    "fetch_game_ids": fetch_game_ids_job,
+    "update_stage_week_and_date": update_stage_week_and_date_job,
+}
+
+def run_season_job(step, season):
+    """Run one step for one season; a bad season file is reported and skipped, as in the sequential loops."""
+    filename = f"games_in_{season}"
+    try:
+        return SEASON_JOBS[step](season)
+    except FileNotFoundError:
+        print(f"Error: File {filename} not found.")
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON in file {filename}: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    return season_result(season)
+
+def run_season_jobs(step, seasons, teams, workers=1, games_dir=GAMES_DIR, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Run a step over every season, `workers` processes at a time. Results come back in season order."""
+    initargs = (teams, games_dir, batch_size, force)
+    if workers <= 1:
+        init_season_worker(*initargs)
+        return [run_season_job(step, season) for season in seasons]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_season_worker, initargs=initargs) as executor:
+        return list(executor.map(run_season_job, [step] * len(seasons), seasons))
+
+def run_season_step(step, workers=1, games_dir=GAMES_DIR, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Run one JSON-side step over every season file and merge the per-season results."""
+    try:
+        teams = load_teams()
+    except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
+        print(f"Error loading teams.json: {e}")
+        return
+
+    seasons = list_seasons(games_dir)
+    results = run_season_jobs(step, seasons, teams, workers, games_dir, batch_size, force)
+
+    error_log = [error for result in results for error in result["errors"]]
+    for result in results:
+        if result["saved"]:
+            print(f"Updated games_in_{result['season']} and saved changes.")
+
+    write_error_log(error_log)
+
+    if step == "update_stage_week_and_date":
+        print(f"Total games updated in MongoDB: {sum(result['updated'] for result in results)}")
+    return results
@@ -1,7 +1,12 @@
-import os
 import json
 from datetime import datetime
-from modules.connection_module import get_mongo_client, get_database
+from pymongo import UpdateOne
+from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+from modules.season_store import GAMES_DIR, list_seasons, load_season, save_season
+from .game_utils import game_fingerprint, stamp_modified, write_error_log
+
+REDSKINS_LOGO = "https://content.sportslogos.net/logos/7/168/full/im5xz2q9bjbg44xep08bf5czq.png"
+DEFAULT_BATCH_SIZE = 500
 
 def normalize_team_name(name):
     """Normalize team names to match MongoDB collection names."""
@@ -9,7 +14,134 @@ def normalize_team_name(name):
     name = name.replace("49Ers", "49ers")
     return name.replace(" ", "_")
 
-def update_stage_week_and_date():
+def game_collection_name(game, team_id_to_collection_name):
+    """Return the winner's collection for a game that can be synced, or None (with the reason printed)."""
+    if "game_id" not in game:
+        print(f"Skipping game without game_id on {game['game_date']}.")
+        return None
+
+    if not game.get("winner_id") or not game.get("loser_id"):
+        print(f"Missing winner_id or loser_id for game on {game['game_date']}. Skipping.")
+        return None
+
+    # Determine the collection name from the winner's team ID
+    collection_name = team_id_to_collection_name.get(game["winner_id"])
+    if not collection_name:
+        print(f"Could not find collection name for winner_id: {game['winner_id']}")
+    return collection_name
+
+def build_game_set(game, home_id, away_id, team_id_to_logo, prefix="games.$[g]"):
+    """Build the $set fields that sync one MongoDB game with its JSON counterpart (prefix="" for a top-level game document)."""
+    winner_id = game["winner_id"]
+    loser_id = game["loser_id"]
+    prefix = f"{prefix}." if prefix else ""
+    fields = {}
+    if "stage" in game:
+        fields[f"{prefix}game.stage"] = game["stage"]
+    if "week_num" in game:
+        fields[f"{prefix}game.week"] = game["week_num"]
+    if "game_date" in game:
+        fields[f"{prefix}game.date.date"] = game["game_date"]
+
+    for team_type, team_id in {"home": home_id, "away": away_id}.items():
+        if team_id == winner_id:
+            correct_team_name = game["winner"]
+            correct_team_logo = team_id_to_logo.get(winner_id)
+        elif team_id == loser_id:
+            correct_team_name = game["loser"]
+            correct_team_logo = team_id_to_logo.get(loser_id)
+        else:
+            continue
+
+        if correct_team_name == "Washington Redskins":
+            correct_team_logo = REDSKINS_LOGO
+
+        fields[f"{prefix}teams.{team_type}.name"] = correct_team_name
+        fields[f"{prefix}teams.{team_type}.logo"] = correct_team_logo
+    return fields
+
+def flush_game_updates(collection, operations, batch_size=DEFAULT_BATCH_SIZE):
+    """Send queued UpdateOne operations in unordered batches and return (matched, modified)."""
+    matched = modified = 0
+    for start in range(0, len(operations), batch_size):
+        result = collection.bulk_write(operations[start:start + batch_size], ordered=False)
+        matched += result.matched_count
+        modified += result.modified_count
+    return matched, modified
+
+def bulk_update_stage_week_and_date(db, games_by_collection, team_id_to_logo, batch_size=DEFAULT_BATCH_SIZE, force=False):
+    """Queue every game's changes per collection and flush them with bulk_write; unchanged fingerprints are skipped."""
+    error_log = []
+    updated_games_count = 0
+
+    for collection_name, games in games_by_collection.items():
+        collection = db[collection_name]
+        fingerprints = {id(game): game_fingerprint(game, team_id_to_logo) for game in games}
+        changed = [game for game in games if force or game.get("fingerprint") != fingerprints[id(game)]]
+        if not changed:
+            print(f"➖ {collection_name}: no changes needed.")
+            continue
+        game_ids = [game["game_id"] for game in changed]
+
+        # One projected read per collection to learn which side each team played on
+        teams_by_game_id = {}
+        db_fingerprints = {}
+        projection = {"games.game.id": 1, "games.game.fingerprint": 1, "games.teams.home.id": 1, "games.teams.away.id": 1}
+        for doc in collection.find({"games.game.id": {"$in": game_ids}}, projection):
+            for db_game in doc.get("games", []):
+                teams_by_game_id[db_game["game"]["id"]] = (db_game["teams"]["home"]["id"], db_game["teams"]["away"]["id"])
+                db_fingerprints[db_game["game"]["id"]] = db_game["game"].get("fingerprint")
+
+        operations = []
+        queued = []
+        for game in changed:
+            game_id = game["game_id"]
+            if game_id not in teams_by_game_id:
+                error_message = f"Game with ID {game_id} not found in collection {collection_name}."
+                print(error_message)
+                error_log.append({
+                    "game_id": game_id,
+                    "winner": game.get("winner"),
+                    "loser": game.get("loser"),
+                    "game_date": game.get("game_date"),
+                    "season": game.get("season"),
+                    "collection": collection_name,
+                    "error": error_message
+                })
+                continue
+
+            fingerprint = fingerprints[id(game)]
+            if not force and db_fingerprints.get(game_id) == fingerprint:
+                game["fingerprint"] = fingerprint
+                continue
+
+            home_id, away_id = teams_by_game_id[game_id]
+            game_set = build_game_set(game, home_id, away_id, team_id_to_logo)
+            game_set["games.$[g].game.fingerprint"] = fingerprint
+            operations.append(UpdateOne(
+                {"games.game.id": game_id},
+                stamp_modified({"$set": game_set}),
+                array_filters=[{"g.game.id": game_id}]
+            ))
+            queued.append((game, fingerprint))
+
+        if operations:
+            matched, modified = flush_game_updates(collection, operations, batch_size)
+            for game, fingerprint in queued:
+                game["fingerprint"] = fingerprint
+            print(f"✅ {collection_name}: {matched} games matched, {modified} games modified.")
+            updated_games_count += modified
+        else:
+            print(f"➖ {collection_name}: no changes needed.")
+
+    return updated_games_count, error_log
+
+def update_stage_week_and_date(bulk=False, batch_size=DEFAULT_BATCH_SIZE, force=False, workers=1):
+    if workers > 1:
+        # One season per process, each flushed with the bulk path
+        from .season_workers import run_season_step
+        return run_season_step("update_stage_week_and_date", workers, batch_size=batch_size, force=force)
+
     try:
         with open("data/teams.json", 'r', encoding='utf-8') as f:
             teams_data = json.load(f)
@@ -33,110 +165,125 @@ def update_stage_week_and_date():
     client = get_mongo_client()
     db = get_database(client)
 
-    games_dir = "games_by_year_data"
+    games_dir = GAMES_DIR
     error_log = []
     scrubbed_games_count = 0
     updated_games_count = 0
+    skipped_games_count = 0
+    games_by_collection = {}  # collection_name -> games queued for bulk_write
+    loaded_seasons = {}  # season -> (games, fingerprints as loaded), to save back any new fingerprints
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
-    for filename in os.listdir(games_dir):
-        if filename.endswith(".json"):
-            file_path = os.path.join(games_dir, filename)
-
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    games_data = json.load(f)
-                    print(f"Loaded {filename}: {len(games_data)} games found.")
-
-                for game in games_data:
-                    if "game_id" not in game:
-                        print(f"Skipping game without game_id on {game['game_date']}.")
-                        continue  # Skip to the next game if no game_id is found
-
-                    game_id = game["game_id"]
-                    winner_id = game.get("winner_id")
-                    loser_id = game.get("loser_id")
-
-                    if not winner_id or not loser_id:
-                        print(f"Missing winner_id or loser_id for game on {game['game_date']}. Skipping.")
-                        continue  # Skip to the next game if either winner_id or loser_id is missing
-
-                    # Determine the collection name from the winner's team ID
-                    collection_name = team_id_to_collection_name.get(winner_id)
-                    if not collection_name:
-                        print(f"Could not find collection name for winner_id: {winner_id}")
-                        continue
-
-                    collection = db[collection_name]
-
-                    # Find the game in the MongoDB collection
-                    document = collection.find_one({"games.game.id": game_id})
-                    if document:
-                        for db_game in document["games"]:
-                            if db_game["game"]["id"] == game_id:
-                                # Update stage, week, and date in MongoDB
-                                db_game["game"]["stage"] = game.get("stage", db_game["game"]["stage"])
-                                db_game["game"]["week"] = game.get("week_num", db_game["game"]["week"])
-                                db_game["game"]["date"]["date"] = game.get("game_date", db_game["game"]["date"]["date"])
-
-                                # Update home and away teams and logos based on winner and loser IDs
-                                for team_type, team_id in {"home": db_game["teams"]["home"]["id"], "away": db_game["teams"]["away"]["id"]}.items():
-                                    if team_id == winner_id:
-                                        correct_team_name = game["winner"]
-                                        correct_team_logo = team_id_to_logo.get(winner_id)
-                                    elif team_id == loser_id:
-                                        correct_team_name = game["loser"]
-                                        correct_team_logo = team_id_to_logo.get(loser_id)
-                                    else:
-                                        continue  # Skip if the team ID doesn't match
-
-                                    # Special case for Washington Redskins logo
-                                    if correct_team_name == "Washington Redskins":
-                                        correct_team_logo = "https://content.sportslogos.net/logos/7/168/full/im5xz2q9bjbg44xep08bf5czq.png"
-
-                                    # Update MongoDB with corrected values
-                                    db_game["teams"][team_type]["name"] = correct_team_name
-                                    db_game["teams"][team_type]["logo"] = correct_team_logo
-
-                                # Save the updated game back to MongoDB
-                                collection.update_one(
-                                    {"games.game.id": game_id},
-                                    {"$set": {"games.$": db_game}}
-                                )
-                                print(f"Updated Game ID {game_id} for The {correct_team_name}")
-
-                                scrubbed_games_count += 1
-                                updated_games_count += 1
+    for season in list_seasons(games_dir):
+        filename = f"games_in_{season}"
+        try:
+            games_data = load_season(season, games_dir)
+            print(f"Loaded {filename}: {len(games_data)} games found.")
+            loaded_seasons[season] = (games_data, [game.get("fingerprint") for game in games_data])
+
+            for game in games_data:
+                collection_name = game_collection_name(game, team_id_to_collection_name)
+                if not collection_name:
+                    continue
+
+                game_id = game["game_id"]
+                winner_id = game["winner_id"]
+                loser_id = game["loser_id"]
+
+                if bulk:
+                    games_by_collection.setdefault(collection_name, []).append(game)
+                    continue
+
+                # Nothing we would write has changed since the last sync
+                fingerprint = game_fingerprint(game, team_id_to_logo)
+                if not force and game.get("fingerprint") == fingerprint:
+                    skipped_games_count += 1
+                    continue
+
+                collection = db[collection_name]
+
+                # Find the game in the MongoDB collection
+                document = collection.find_one({"games.game.id": game_id})
+                if document:
+                    for db_game in document["games"]:
+                        if db_game["game"]["id"] == game_id:
+                            if not force and db_game["game"].get("fingerprint") == fingerprint:
+                                game["fingerprint"] = fingerprint
+                                skipped_games_count += 1
                                 break
-                    else:
-                        error_message = f"Game with ID {game_id} not found in collection {collection_name}."
-                        print(error_message)
-                        error_log.append({
-                            "game_id": game_id,
-                            "winner": game.get("winner"),
-                            "loser": game.get("loser"),
-                            "game_date": game.get("game_date"),
-                            "season": game.get("season"),
-                            "collection": collection_name,
-                            "error": error_message
-                        })
-
-            except FileNotFoundError:
-                print(f"Error: File {filename} not found.")
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON in file {filename}: {e}")
-            except Exception as e:
-                print(f"An error occurred: {e}")
+
+                            # Update stage, week, and date in MongoDB
+                            db_game["game"]["stage"] = game.get("stage", db_game["game"]["stage"])
+                            db_game["game"]["week"] = game.get("week_num", db_game["game"]["week"])
+                            db_game["game"]["date"]["date"] = game.get("game_date", db_game["game"]["date"]["date"])
+
+                            # Update home and away teams and logos based on winner and loser IDs
+                            for team_type, team_id in {"home": db_game["teams"]["home"]["id"], "away": db_game["teams"]["away"]["id"]}.items():
+                                if team_id == winner_id:
+                                    correct_team_name = game["winner"]
+                                    correct_team_logo = team_id_to_logo.get(winner_id)
+                                elif team_id == loser_id:
+                                    correct_team_name = game["loser"]
+                                    correct_team_logo = team_id_to_logo.get(loser_id)
+                                else:
+                                    continue  # Skip if the team ID doesn't match
+
+                                # Special case for Washington Redskins logo
+                                if correct_team_name == "Washington Redskins":
+                                    correct_team_logo = REDSKINS_LOGO
+
+                                # Update MongoDB with corrected values
+                                db_game["teams"][team_type]["name"] = correct_team_name
+                                db_game["teams"][team_type]["logo"] = correct_team_logo
+
+                            # Save the updated game back to MongoDB
+                            db_game["game"]["fingerprint"] = fingerprint
+                            collection.update_one(
+                                {"games.game.id": game_id},
+                                stamp_modified({"$set": {"games.$": db_game}})
+                            )
+                            print(f"Updated Game ID {game_id} for The {correct_team_name}")
+                            game["fingerprint"] = fingerprint
+
+                            scrubbed_games_count += 1
+                            updated_games_count += 1
+                            break
+                else:
+                    error_message = f"Game with ID {game_id} not found in collection {collection_name}."
+                    print(error_message)
+                    error_log.append({
+                        "game_id": game_id,
+                        "winner": game.get("winner"),
+                        "loser": game.get("loser"),
+                        "game_date": game.get("game_date"),
+                        "season": game.get("season"),
+                        "collection": collection_name,
+                        "error": error_message
+                    })
+
+        except FileNotFoundError:
+            print(f"Error: File {filename} not found.")
+        except json.JSONDecodeError as e:
+            print(f"Error decoding JSON in file {filename}: {e}")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+
+    if bulk:
+        bulk_updated_count, bulk_errors = bulk_update_stage_week_and_date(db, games_by_collection, team_id_to_logo, batch_size, force)
+        updated_games_count += bulk_updated_count
+        error_log.extend(bulk_errors)
+
+    # Keep the synced fingerprints in the season files so the next run can skip unchanged games
+    for season, (games_data, loaded_fingerprints) in loaded_seasons.items():
+        if [game.get("fingerprint") for game in games_data] != loaded_fingerprints:
+            save_season(games_data, season, games_dir)
 
     # Log any errors to a JSON file in test_responses directory
-    if error_log:
-        os.makedirs("test_responses", exist_ok=True)
-        error_log_path = os.path.join("test_responses", f"id_errors_{timestamp}.json")
-        with open(error_log_path, 'w', encoding='utf-8') as error_file:
-            json.dump(error_log, error_file, indent=4)
-        print(f"Logged errors to {error_log_path}")
+    write_error_log(error_log, timestamp)
 
     print(f"Total games updated in MongoDB: {updated_games_count}")
+    if skipped_games_count:
+        print(f"Games skipped as unchanged: {skipped_games_count}")
 
     # Close the MongoDB client after processing all files
-    client.close()
+    release_mongo_client(client)
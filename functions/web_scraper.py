@@ -1,15 +1,30 @@
-import os
-import json
 import time
+import queue
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from modules import setup_driver
-from .game_utils import is_duplicate, correct_date_format, stage_check, rename_week_num
+from modules.page_cache import PageCache, PageCacheMiss
+from modules.profiling import phase
+from modules.season_store import season_path, season_exists, load_season, save_season
+from .game_utils import merge_games, correct_date_format, stage_check, rename_week_num
 
-MIN_EXECUTION_TIME = 7  # Minimum execution time in seconds per year
+MIN_REQUEST_INTERVAL = 7  # Minimum seconds between page loads, across all workers
 MAX_RETRIES = 5  # Maximum number of retries
 RETRY_DELAY = 10  # Initial delay between retries in seconds
+DEFAULT_WORKERS = 1  # Years downloaded in parallel
+HTTP_TIMEOUT = 30  # Seconds to wait for a plain-HTTP page
+USER_AGENT = "Mozilla/5.0 (compatible; python-data-janitor)"
+
+REGULAR_SEASON_URL = "https://www.pro-football-reference.com/years/{}/games.htm"
+PRESEASON_URL = "https://www.pro-football-reference.com/years/{}/preseason.htm"
+
+BACKENDS = ("selenium", "http")
+TABLE_IDS = {"regular season": "games", "preseason": "preseason"}
 
 @contextmanager
 def get_driver():
@@ -19,6 +34,203 @@ def get_driver():
     finally:
         driver.quit()
 
+class RateLimiter:
+    """Space out requests so no two start less than `interval` seconds apart, whatever thread asks."""
+
+    def __init__(self, interval=MIN_REQUEST_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            with phase("sleep"):
+                time.sleep(slot - now)
+
+class DriverPool:
+    """A bounded set of headless browsers that are reused across downloads."""
+
+    def __init__(self, size=DEFAULT_WORKERS, factory=setup_driver):
+        self.size = size
+        self.factory = factory
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        except Exception:
+            # A failed page load can leave the browser in a bad state, so replace it
+            self._discard(driver)
+            raise
+        else:
+            self._idle.put(driver)
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    break
+            # Pool is full; wait for a driver to come back (or for a slot to free up)
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+        try:
+            with phase("driver_start"):
+                return self.factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    def close(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            driver.quit()
+            with self._lock:
+                self._created -= 1
+
+_session = None
+_session_guard = threading.Lock()
+
+def get_http_session(pool_size=DEFAULT_WORKERS):
+    """Return the shared requests session, creating it with a connection pool on first use."""
+    global _session
+    with _session_guard:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max(pool_size, 1), pool_maxsize=max(pool_size, 1))
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.headers.update({"User-Agent": USER_AGENT})
+        return _session
+
+def fetch_page_http(url, headers=None):
+    """GET a page over plain HTTP and return the response (a 304 is returned, not raised)."""
+    with phase("fetch") as timing:
+        response = get_http_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+        timing.add_bytes(len(response.content))
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+def has_table(soup, season_type):
+    table_id = TABLE_IDS.get(season_type)
+    return table_id is None or soup.find('table', {'id': table_id}) is not None
+
+def fetch_soup(url, season_type, backend, pool, rate_limiter, year=None, cache=None, offline=False):
+    """Fetch a page with the chosen backend, falling back to Selenium when plain HTTP can't serve the table."""
+    entry = cache.get(url) if cache else None
+    if entry and (offline or cache.is_fresh(entry, year)):
+        print(f"Using cached copy of {url}")
+        with phase("parse"):
+            return BeautifulSoup(entry["html"], 'lxml')
+    if offline:
+        raise PageCacheMiss(f"{url} is not in the page cache (offline mode).")
+
+    if backend == "http":
+        try:
+            rate_limiter.wait()
+            response = fetch_page_http(url, PageCache.conditional_headers(entry))
+            if response.status_code == 304 and entry:
+                print(f"{url} not modified, using cached copy.")
+                cache.touch(url, entry)
+                with phase("parse"):
+                    return BeautifulSoup(entry["html"], 'lxml')
+
+            with phase("parse"):
+                soup = BeautifulSoup(response.text, 'lxml')
+            print(f"Fetched {url} over HTTP")
+            if has_table(soup, season_type):
+                if cache:
+                    cache.put(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return soup
+            print(f"Table '{TABLE_IDS[season_type]}' not in the served HTML for {url}, falling back to Selenium.")
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {url}: {e}. Falling back to Selenium.")
+
+    with pool.driver() as driver:
+        rate_limiter.wait()
+        with phase("fetch") as timing:
+            driver.get(url)
+            print(f"Bot navigated to {url}")
+            html = driver.page_source
+            timing.add_bytes(len(html))
+
+    with phase("parse"):
+        soup = BeautifulSoup(html, 'html.parser')
+    # Only cache pages that have the table, so an error page is never pinned for a closed season
+    if cache and has_table(soup, season_type):
+        cache.put(url, html)
+    return soup
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+def _lock_for(path):
+    with _file_locks_guard:
+        return _file_locks.setdefault(path, threading.Lock())
+
+# Output field -> data-stat of the cell it is read from, per table
+REGULAR_SEASON_FIELDS = {
+    "game_day_of_week": "game_day_of_week",
+    "game_date": "game_date",
+    "gametime": "gametime",
+    "winner": "winner",
+    "loser": "loser",
+    "pts_win": "pts_win",
+    "pts_lose": "pts_lose",
+    "yards_win": "yards_win",
+    "yards_lose": "yards_lose",
+}
+
+PRESEASON_FIELDS = {
+    "game_day_of_week": "game_day_of_week",
+    "game_date": "boxscore_word",
+    "visitor_team": "visitor_team",
+    "points": "points",
+    "game_location": "game_location",
+    "home_team": "home_team",
+    "points_opp": "points_opp",
+}
+
+def row_cells(row):
+    """Walk a row's cells once and map each data-stat to its stripped text."""
+    cells = {}
+    for cell in row.find_all(('th', 'td'), recursive=False):
+        stat = cell.get('data-stat')
+        if stat is not None and (cell.name, stat) not in cells:
+            cells[(cell.name, stat)] = cell.get_text().strip()
+    return cells
+
+def extract_fields(cells, field_spec):
+    """Pick the td values named in a field spec out of a row_cells map."""
+    return {field: cells.get(('td', stat)) for field, stat in field_spec.items()}
+
 def parse_regular_season_data(soup):
     data = []
     table = soup.find('table', {'id': 'games'})
@@ -28,34 +240,16 @@ def parse_regular_season_data(soup):
 
     rows = table.find_all('tr', {'data-row': True})
     for row in rows:
-        week_num_elem = row.find('th', {'data-stat': 'week_num'})
-        week_num = week_num_elem.text.strip() if week_num_elem else None
+        cells = row_cells(row)
+        week_num = cells.get(('th', 'week_num'))
         if week_num is None:
             continue  # Skip header rows or invalid week_num rows
 
-        game_day_of_week = row.find('td', {'data-stat': 'game_day_of_week'}).text.strip() if row.find('td', {'data-stat': 'game_day_of_week'}) else None
-        game_date = row.find('td', {'data-stat': 'game_date'}).text.strip() if row.find('td', {'data-stat': 'game_date'}) else None
-        gametime = row.find('td', {'data-stat': 'gametime'}).text.strip() if row.find('td', {'data-stat': 'gametime'}) else None
-        winner = row.find('td', {'data-stat': 'winner'}).text.strip() if row.find('td', {'data-stat': 'winner'}) else None
-        loser = row.find('td', {'data-stat': 'loser'}).text.strip() if row.find('td', {'data-stat': 'loser'}) else None
-        pts_win = row.find('td', {'data-stat': 'pts_win'}).text.strip() if row.find('td', {'data-stat': 'pts_win'}) else None
-        pts_lose = row.find('td', {'data-stat': 'pts_lose'}).text.strip() if row.find('td', {'data-stat': 'pts_lose'}) else None
-        yards_win = row.find('td', {'data-stat': 'yards_win'}).text.strip() if row.find('td', {'data-stat': 'yards_win'}) else None
-        yards_lose = row.find('td', {'data-stat': 'yards_lose'}).text.strip() if row.find('td', {'data-stat': 'yards_lose'}) else None
-
         game_data = {
             "stage": stage_check({}, week_num),
             "week_num": rename_week_num(week_num),
-            "game_day_of_week": game_day_of_week,
-            "game_date": game_date,
-            "gametime": gametime,
-            "winner": winner,
-            "loser": loser,
-            "pts_win": pts_win,
-            "pts_lose": pts_lose,
-            "yards_win": yards_win,
-            "yards_lose": yards_lose
         }
+        game_data.update(extract_fields(cells, REGULAR_SEASON_FIELDS))
         data.append(game_data)
     return data
 
@@ -68,19 +262,13 @@ def parse_preseason_data(soup, year):
 
     rows = table.find_all('tr', {'data-row': True})
     for row in rows:
-        week_num_elem = row.find('th', {'data-stat': 'week_num'})
-        week_num = week_num_elem.text.strip() if week_num_elem else ""
+        cells = row_cells(row)
+        week_num = cells.get(('th', 'week_num'), "")
 
         if week_num == "":  # Handle Hall of Fame game for years 2017 and onwards
             week_num = "Hall of Fame Game"
 
-        game_day_of_week = row.find('td', {'data-stat': 'game_day_of_week'}).text.strip() if row.find('td', {'data-stat': 'game_day_of_week'}) else None
-        game_date = row.find('td', {'data-stat': 'boxscore_word'}).text.strip() if row.find('td', {'data-stat': 'boxscore_word'}) else None
-        visitor_team = row.find('td', {'data-stat': 'visitor_team'}).text.strip() if row.find('td', {'data-stat': 'visitor_team'}) else None
-        points = row.find('td', {'data-stat': 'points'}).text.strip() if row.find('td', {'data-stat': 'points'}) else None
-        game_location = row.find('td', {'data-stat': 'game_location'}).text.strip() if row.find('td', {'data-stat': 'game_location'}) else None
-        home_team = row.find('td', {'data-stat': 'home_team'}).text.strip() if row.find('td', {'data-stat': 'home_team'}) else None
-        points_opp = row.find('td', {'data-stat': 'points_opp'}).text.strip() if row.find('td', {'data-stat': 'points_opp'}) else None
+        fields = extract_fields(cells, PRESEASON_FIELDS)
 
         if year in range(2010, 2016) and year not in [2011, 2016, 2020] and week_num == "1":
             week_num = "Hall of Fame Game"
@@ -90,77 +278,93 @@ def parse_preseason_data(soup, year):
         game_data = {
             "stage": "Pre Season",
             "week_num": week_num,
-            "game_day_of_week": game_day_of_week,
-            "game_date": correct_date_format(game_date, year),
-            "visitor_team": visitor_team,
-            "points": points,
-            "game_location": game_location,
-            "home_team": home_team,
-            "points_opp": points_opp,
+            "game_day_of_week": fields["game_day_of_week"],
+            "game_date": correct_date_format(fields["game_date"], year),
+            "visitor_team": fields["visitor_team"],
+            "points": fields["points"],
+            "game_location": fields["game_location"],
+            "home_team": fields["home_team"],
+            "points_opp": fields["points_opp"],
         }
         data.append(game_data)
     return data
 
-def download_data_for_year(year, season_type, base_url, parse_function, retries=0):
-    with get_driver() as driver:
-        start_time = time.time()
+def download_data_for_year(year, season_type, base_url, parse_function, retries=0, pool=None, rate_limiter=None, backend="selenium", cache=None, offline=False, max_retries=MAX_RETRIES):
+    owns_pool = pool is None
+    if owns_pool:
+        pool = DriverPool(size=1)
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+
+    try:
         all_data = []
 
         try:
             url = base_url.format(year)
-            driver.get(url)
-            print(f"Bot navigated to {url}")
+            soup = fetch_soup(url, season_type, backend, pool, rate_limiter, year, cache, offline)
 
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            if season_type == "regular season":
-                season_data = parse_function(soup)
-            else:
-                season_data = parse_function(soup, year)
+            with phase("parse"):
+                if season_type == "regular season":
+                    season_data = parse_function(soup)
+                else:
+                    season_data = parse_function(soup, year)
 
             # Load existing data or create new
-            output_path = os.path.join("games_by_year_data", f"games_in_{year}.json")
-            if os.path.exists(output_path):
-                with open(output_path, 'r', encoding='utf-8') as f:
-                    all_data = json.load(f)
-
-            # Add new data if not duplicate
-            for game in season_data:
-                if not is_duplicate(all_data, game):
-                    all_data.append(game)
-
-            # Save updated data to JSON
-            os.makedirs("games_by_year_data", exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(all_data, f, indent=4)
+            output_path = season_path(year)
+            with _lock_for(output_path):
+                if season_exists(year):
+                    all_data = load_season(year)
+
+                # Add new games and refresh ones we already have
+                added, updated = merge_games(all_data, season_data, season=year)
+                print(f"{season_type.capitalize()} {year}: {added} games added, {updated} games updated.")
+
+                # Save updated data to JSON
+                save_season(all_data, year)
             print(f"{season_type.capitalize()} data for {year} downloaded and saved as JSON.")
 
+        except PageCacheMiss as e:
+            # Offline cache miss: retrying can't help
+            print(f"Skipping {season_type} data for {year}: {e}")
+            raise
+
         except Exception as e:
             print(f"An error occurred while downloading {season_type} data for {year}: {e}")
             print(traceback.format_exc())
-            if retries < MAX_RETRIES:
-                print(f"Retrying ({retries + 1}/{MAX_RETRIES}) in {RETRY_DELAY * (retries + 1)} seconds...")
-                time.sleep(RETRY_DELAY * (retries + 1))
-                download_data_for_year(year, season_type, base_url, parse_function, retries + 1)
+            if retries < max_retries:
+                print(f"Retrying ({retries + 1}/{max_retries}) in {RETRY_DELAY * (retries + 1)} seconds...")
+                with phase("sleep"):
+                    time.sleep(RETRY_DELAY * (retries + 1))
+                download_data_for_year(year, season_type, base_url, parse_function, retries + 1, pool, rate_limiter, backend, cache, offline, max_retries)
             else:
-                print(f"Failed to download {season_type} data for {year} after {MAX_RETRIES} retries.")
+                print(f"Failed to download {season_type} data for {year} after {max_retries} retries.")
                 raise e
+    finally:
+        if owns_pool:
+            pool.close()
 
-        # Ensure the loop takes at least MIN_EXECUTION_TIME
-        elapsed_time = time.time() - start_time
-        if elapsed_time < MIN_EXECUTION_TIME:
-            time.sleep(MIN_EXECUTION_TIME - elapsed_time)
+def download_years(years, season_type, base_url, parse_function, workers=DEFAULT_WORKERS, rate_limiter=None, backend="selenium", use_cache=True, offline=False):
+    """Download several years over a shared driver pool, at most `workers` at a time."""
+    pool = DriverPool(size=workers)
+    cache = PageCache() if use_cache or offline else None
+    rate_limiter = rate_limiter or RateLimiter()
+    if backend == "http":
+        get_http_session(workers)
 
-def download_pfc_data(years):
-    for year in years:
+    def download(year):
         try:
-            download_data_for_year(year, "regular season", "https://www.pro-football-reference.com/years/{}/games.htm", parse_regular_season_data)
+            download_data_for_year(year, season_type, base_url, parse_function, pool=pool, rate_limiter=rate_limiter, backend=backend, cache=cache, offline=offline)
         except Exception as e:
             print(f"Skipping {year} due to repeated errors: {e}")
 
-def download_preseason_data(years):
-    for year in years:
-        try:
-            download_data_for_year(year, "preseason", "https://www.pro-football-reference.com/years/{}/preseason.htm", parse_preseason_data)
-        except Exception as e:
-            print(f"Skipping {year} due to repeated errors: {e}")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(download, years))
+    finally:
+        pool.close()
+
+def download_pfc_data(years, workers=DEFAULT_WORKERS, backend="selenium", use_cache=True, offline=False):
+    download_years(years, "regular season", REGULAR_SEASON_URL, parse_regular_season_data, workers, backend=backend, use_cache=use_cache, offline=offline)
+
+def download_preseason_data(years, workers=DEFAULT_WORKERS, backend="selenium", use_cache=True, offline=False):
+    download_years(years, "preseason", PRESEASON_URL, parse_preseason_data, workers, backend=backend, use_cache=use_cache, offline=offline)
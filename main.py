@@ -1,33 +1,12 @@
 # main.py
-import os
+# Each action's handler is built by a loader that does its own imports, so an action only pays
+# for the libraries it uses (no selenium/bs4 for `check`, nothing heavy for --help).
 import argparse
-import subprocess
-import time
 from dotenv import load_dotenv
-from modules import get_mongo_client, get_database
-
-from functions.data_check import check_missing_data_by_year
-from functions.web_scraper import download_pfc_data, download_preseason_data
-from functions.assign_team_ids_and_update_json import assign_team_ids_and_update_json
-from functions.update_stage_week_and_date import update_stage_week_and_date
-from functions.mongo_bleach import mongo_bleach
-from functions.fetch_game_ids import fetch_game_ids_and_update_json
-from functions.normalize_week_fields import normalize_week_fields
 
 load_dotenv()
 
-parser = argparse.ArgumentParser(description="NFL Game Data CLI")
-parser.add_argument("action", choices=[
-    "check", "download", "download_preseason", "scrub", 
-    "mongo_scrub", "full_mongo_scrub", "download_all", 
-    "mongo_test", "fetch_ids", "normalize_weeks"
-], help="The action to perform.")
-
-parser.add_argument("--team", help="Team to target (or 'all')")
-parser.add_argument("--years", help="Years to target (e.g. '2011,2013,2015-2017')")
-parser.add_argument("--date", help="Specific date (YYYY-MM-DD)")
-
-args = parser.parse_args()
+DEFAULT_YEARS = list(range(2010, 2024))
 
 def parse_years(years_arg):
     if years_arg == "all":
@@ -41,73 +20,212 @@ def parse_years(years_arg):
             years.add(int(part))
     return sorted(years)
 
-years = parse_years(args.years) if args.years else None
-
-if args.action == "check":
-    client = get_mongo_client()
-    db = get_database(client)
-
-    collections = db.list_collection_names() if args.team == "all" else [args.team]
-    total_missing = 0
-
-    for collection in collections:
-        missing = check_missing_data_by_year(db, collection)
-        for year, count in sorted(missing.items()):
-            if years == "all" or year in years:
-                print(f"{collection.replace('_', ' ')} {year}: {count} games missing")
-                total_missing += count
-
-    print(f"\nTotal missing games: {total_missing}")
-    client.close()
-
-elif args.action == "download":
-    download_pfc_data(list(range(2010, 2024)) if years == "all" else years)
-
-elif args.action == "download_preseason":
-    download_preseason_data(list(range(2010, 2024)) if years == "all" else years)
-
-elif args.action == "download_all":
-    def run(command):
-        retries = 0
-        while retries < 5:
-            try:
-                if subprocess.run(command, shell=True, timeout=120, check=True).returncode == 0:
-                    return True
-            except subprocess.TimeoutExpired:
-                print("Timeout. Retrying...")
-            except subprocess.CalledProcessError as e:
-                print(f"Error: {e}. Retrying...")
-            retries += 1
-            time.sleep(10)
-        return False
-
-    for year in range(2010, 2024):
-        print(f"Downloading year {year}...")
-        run(f"python main.py download_preseason --years {year}")
-        run(f"python main.py download --years {year}")
-
-elif args.action == "fetch_ids":
-    fetch_game_ids_and_update_json()
-    
-elif args.action == "normalize_weeks":
-    
-    print("🔧 Normalizing game.week values (adding 'Week ' prefix where needed)...")
-    normalize_week_fields()
-
-elif args.action == "full_mongo_scrub":
-    print("✅ Assigning team IDs to JSON...")
-    assign_team_ids_and_update_json()
-    
-    print("✅ Fetching game IDs from MongoDB...")
-    fetch_game_ids_and_update_json()
-    
-    print("✅ Updating stage/week/date fields...")
-    update_stage_week_and_date()
-    
-    print("✅ Final bleach pass...")
-    mongo_bleach()
-    
-    print("🔧 Normalizing game.week values (adding 'Week ' prefix where needed)...")
-    normalize_week_fields()
+def check_handler():
+    from modules.connection_module import get_mongo_client, get_database, release_mongo_client
+    from functions.data_check import check_missing_data_for_collections
+
+    def run(args, years):
+        client = get_mongo_client()
+        db = get_database(client)
+
+        collections = db.list_collection_names() if args.team == "all" else [args.team]
+        total_missing = 0
+
+        missing_by_collection = check_missing_data_for_collections(db, collections, args.concurrency or 1)
+
+        for collection in collections:
+            missing = missing_by_collection[collection]
+            for year, count in sorted(missing.items()):
+                if years == "all" or year in years:
+                    print(f"{collection.replace('_', ' ')} {year}: {count} games missing")
+                    total_missing += count
+
+        print(f"\nTotal missing games: {total_missing}")
+        release_mongo_client(client)
+    return run
+
+def download_handler():
+    from functions.web_scraper import download_pfc_data
+
+    def run(args, years):
+        download_pfc_data(DEFAULT_YEARS if years == "all" else years, workers=args.concurrency or 1, backend=args.backend, use_cache=not args.no_cache, offline=args.offline)
+    return run
+
+def download_preseason_handler():
+    from functions.web_scraper import download_preseason_data
 
+    def run(args, years):
+        download_preseason_data(DEFAULT_YEARS if years == "all" else years, workers=args.concurrency or 1, backend=args.backend, use_cache=not args.no_cache, offline=args.offline)
+    return run
 
+def download_all_handler():
+    from functions.download_scheduler import run_download_jobs
+
+    def run(args, years):
+        run_download_jobs(
+            DEFAULT_YEARS if years in (None, "all") else years,
+            workers=args.concurrency or 1, backend=args.backend, use_cache=not args.no_cache, offline=args.offline, restart=args.restart
+        )
+    return run
+
+def assign_ids_handler():
+    from functions.assign_team_ids_and_update_json import assign_team_ids_and_update_json
+
+    def run(args, years):
+        assign_team_ids_and_update_json(engine=args.engine, workers=args.workers)
+    return run
+
+def fetch_ids_handler():
+    from functions.fetch_game_ids import fetch_game_ids_and_update_json
+
+    def run(args, years):
+        fetch_game_ids_and_update_json(workers=args.workers)
+    return run
+
+def update_stage_week_handler():
+    from functions.update_stage_week_and_date import update_stage_week_and_date
+
+    def run(args, years):
+        update_stage_week_and_date(bulk=True, batch_size=args.batch_size, force=args.force, workers=args.workers)
+    return run
+
+def normalize_weeks_handler():
+    from functions.normalize_week_fields import normalize_week_fields
+    from functions.async_scrub import DEFAULT_CONCURRENCY, normalize_week_fields_async
+
+    def run(args, years):
+        print("🔧 Normalizing game.week values (adding 'Week ' prefix where needed)...")
+        if args.use_async:
+            normalize_week_fields_async(concurrency=args.concurrency or DEFAULT_CONCURRENCY, dry_run=args.dry_run)
+        else:
+            normalize_week_fields(server_side=args.server_side, dry_run=args.dry_run)
+    return run
+
+def full_mongo_scrub_handler():
+    from functions.pipeline import run_pipeline
+    from functions.async_scrub import DEFAULT_CONCURRENCY
+
+    def run(args, years):
+        concurrency = args.concurrency or (DEFAULT_CONCURRENCY if args.use_async else 1)
+        run_pipeline(batch_size=args.batch_size, concurrency=concurrency, force=args.force, engine=args.engine, game_store=args.game_store)
+    return run
+
+def migrate_games_handler():
+    from functions.game_store import run_game_store
+
+    def run(args, years):
+        run_game_store(batch_size=args.batch_size)
+    return run
+
+def sync_games_handler():
+    from functions.game_store import run_game_store
+
+    def run(args, years):
+        run_game_store(sync=True, batch_size=args.batch_size)
+    return run
+
+def export_handler():
+    from functions.export_parquet import EXPORT_DIR, ROW_GROUP_SIZE, export_parquet
+
+    def run(args, years):
+        export_parquet(
+            args.export_dir or EXPORT_DIR, None if years in (None, "all") else years,
+            incremental=not args.full, row_group_size=args.row_group_size or ROW_GROUP_SIZE, verify=args.verify
+        )
+    return run
+
+def ensure_indexes_handler():
+    from functions.indexes import ensure_indexes_command
+
+    def run(args, years):
+        if ensure_indexes_command(None if args.team in (None, "all") else [args.team], explain=not args.no_explain):
+            raise SystemExit(1)  # A scrub query still does a COLLSCAN
+    return run
+
+def no_handler():
+    def run(args, years):
+        print(f"'{args.action}' has no handler; see full_mongo_scrub for the scrub steps.")
+    return run
+
+# action -> loader that imports what the action needs and returns its run(args, years)
+ACTIONS = {
+    "check": check_handler,
+    "download": download_handler,
+    "download_preseason": download_preseason_handler,
+    "download_all": download_all_handler,
+    "assign_ids": assign_ids_handler,
+    "fetch_ids": fetch_ids_handler,
+    "update_stage_week": update_stage_week_handler,
+    "normalize_weeks": normalize_weeks_handler,
+    "full_mongo_scrub": full_mongo_scrub_handler,
+    "migrate_games": migrate_games_handler,
+    "sync_games": sync_games_handler,
+    "export": export_handler,
+    "ensure_indexes": ensure_indexes_handler,
+    "scrub": no_handler,
+    "mongo_scrub": no_handler,
+    "mongo_test": no_handler,
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="NFL Game Data CLI")
+    parser.add_argument("action", choices=list(ACTIONS), help="The action to perform.")
+
+    parser.add_argument("--team", help="Team to target (or 'all')")
+    parser.add_argument("--years", help="Years to target (e.g. '2011,2013,2015-2017')")
+    parser.add_argument("--date", help="Specific date (YYYY-MM-DD)")
+    parser.add_argument("--concurrency", type=int, help="Number of collections (or years, for downloads) to process at once")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Fan MongoDB scrub steps out over collections concurrently")
+    parser.add_argument("--workers", type=int, default=1, help="assign_ids/fetch_ids/update_stage_week: seasons processed in parallel worker processes")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium", help="How pages are fetched for downloads (http falls back to Selenium when needed)")
+    parser.add_argument("--offline", action="store_true", help="Downloads: re-parse pages from the local page cache only, never touching the network")
+    parser.add_argument("--no-cache", action="store_true", help="Downloads: ignore the local page cache")
+    parser.add_argument("--restart", action="store_true", help="download_all: ignore download_state.json and run every job again")
+    parser.add_argument("--server-side", action="store_true", help="normalize_weeks: rewrite week values inside MongoDB instead of round-tripping games arrays")
+    parser.add_argument("--dry-run", action="store_true", help="normalize_weeks: only count the games that would change")
+    parser.add_argument("--force", action="store_true", help="full_mongo_scrub/update_stage_week: write every game, even when its fingerprint is unchanged")
+    parser.add_argument("--game-store", action="store_true", help="full_mongo_scrub: write each game once to the normalized games store, then sync the team collections")
+    parser.add_argument("--engine", choices=["python", "columnar"], default="python", help="full_mongo_scrub/assign_ids: engine for the team ID pass (columnar needs pandas)")
+    parser.add_argument("--export-dir", help="export: directory for the season-partitioned Parquet dataset (default: export)")
+    parser.add_argument("--full", action="store_true", help="export: rewrite every season, not only the ones that changed")
+    parser.add_argument("--verify", action="store_true", help="export: also re-read every season's columns and rewrite any that changed without a scrub step")
+    parser.add_argument("--row-group-size", type=int, help="export: rows per Parquet row group and per in-memory batch (default: 50000)")
+    parser.add_argument("--no-explain", action="store_true", help="ensure_indexes: skip the explain() report")
+    parser.add_argument("--profile", action="store_true", help="Time every phase (fetch, parse, JSON, file I/O, DB read/write, sleeps) and print a summary at the end")
+    parser.add_argument("--profile-out", help="With --profile: write a Chrome trace (.json) or a cProfile dump (.prof) to this path")
+    parser.add_argument("--mongo-stats", action="store_true", help="Print per-command MongoDB latency counters at the end")
+    parser.add_argument("--batch-size", type=int, default=500, help="Operations per bulk_write batch")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    years = parse_years(args.years) if args.years else None
+
+    profiler = None
+    if args.profile:
+        from modules.profiling import enable_profiling
+        enable_profiling(trace=bool(args.profile_out) and not args.profile_out.endswith(".prof"))
+        if args.profile_out and args.profile_out.endswith(".prof"):
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+    run = ACTIONS[args.action]()
+    run(args, years)
+
+    if args.mongo_stats:
+        from modules.connection_module import print_command_stats
+        print_command_stats()
+
+    if args.profile:
+        from modules.profiling import print_profile, write_trace
+        print_profile()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile_out)
+            print(f"Wrote cProfile stats to {args.profile_out}")
+        elif args.profile_out:
+            write_trace(args.profile_out)
+
+if __name__ == "__main__":
+    main()
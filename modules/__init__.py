@@ -1,6 +1,17 @@
 # modules/__init__.py
-from .connection_module import get_mongo_client, get_database
-from .setup_driver import setup_driver
+# Names load from their submodule on first use, so `import modules` doesn't pull in selenium or pymongo
+from .lazy_exports import lazy_exports
 
-__all__ = ['get_mongo_client', 'get_database', 'setup_driver']
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'connection_module': ['get_mongo_client', 'get_database', 'release_mongo_client', 'close_mongo_clients', 'get_command_stats', 'print_command_stats'],
+    'setup_driver': ['setup_driver'],
+    'profiling': ['enable_profiling', 'phase', 'print_profile', 'write_trace'],
+    'season_store': ['list_seasons', 'load_season', 'iter_season', 'save_season', 'append_season', 'season_exists', 'find_season_file'],
+})
 
+__all__ = [
+    'get_mongo_client', 'get_database', 'release_mongo_client', 'close_mongo_clients', 'get_command_stats', 'print_command_stats',
+    'setup_driver',
+    'enable_profiling', 'phase', 'print_profile', 'write_trace',
+    'list_seasons', 'load_season', 'iter_season', 'save_season', 'append_season', 'season_exists', 'find_season_file'
+]
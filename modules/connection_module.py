@@ -1,22 +1,146 @@
 # modules/connection_module.py
 import os
-from pymongo import MongoClient
+import atexit
+import threading
+import bson
+from pymongo import MongoClient, monitoring
 from dotenv import load_dotenv
+from .profiling import DB_WRITE_COMMANDS, profiling_enabled, record
 
 load_dotenv()
 
-def get_mongo_client():
+# Environment variable -> (MongoClient option, parser). Unset variables fall back to pymongo's defaults.
+CLIENT_OPTION_ENV = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_COMPRESSORS": ("compressors", str),  # e.g. "zstd,snappy,zlib"
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    "MONGO_RETRY_WRITES": ("retryWrites", lambda value: value.lower() in ("1", "true", "yes")),
+    "MONGO_RETRY_READS": ("retryReads", lambda value: value.lower() in ("1", "true", "yes")),
+    "MONGO_READ_PREFERENCE": ("readPreference", str),  # e.g. "secondaryPreferred"
+}
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Count MongoDB commands and their round-trip time, per command name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+        self._sent_bytes = {}  # (connection, request_id) -> size of a write command, while --profile is on
+
+    def _record(self, event, failed):
+        with self._lock:
+            stats = self.stats.setdefault(event.command_name, {"count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0})
+            elapsed_ms = event.duration_micros / 1000
+            stats["count"] += 1
+            stats["failed"] += int(failed)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            sent = self._sent_bytes.pop((event.connection_id, event.request_id), 0)
+
+        if profiling_enabled():
+            # Writes are sized by what was sent, reads by what came back
+            is_write = event.command_name in DB_WRITE_COMMANDS
+            received = 0 if is_write or failed else len(bson.encode(event.reply))
+            record("db_write" if is_write else "db_read", event.duration_micros / 1e6, sent + received)
+
+    def started(self, event):
+        if profiling_enabled() and event.command_name in DB_WRITE_COMMANDS:
+            with self._lock:
+                self._sent_bytes[(event.connection_id, event.request_id)] = len(bson.encode(event.command))
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self.stats.items()}
+
+command_latency = CommandLatencyListener()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def mongo_client_options(**overrides):
+    """MongoClient keyword options from the MONGO_* environment variables, with explicit overrides on top."""
+    options = {}
+    for env_name, (option, parse) in CLIENT_OPTION_ENV.items():
+        value = os.getenv(env_name)
+        if value:
+            options[option] = parse(value)
+    options.update(overrides)
+    return options
+
+def get_mongo_client(shared=True, **overrides):
+    """Return the process-wide client for these options, creating it on first use.
+
+    Pass shared=False for a private client that the caller must close.
+    """
     try:
         connection_string = os.getenv("MONGO_DB_CONNECTION_STRING")
         if not connection_string:
             raise ValueError("No connection string found in environment variables.")
-        
-        client = MongoClient(connection_string)
+
+        options = mongo_client_options(**overrides)
+        if not shared:
+            return MongoClient(connection_string, event_listeners=[command_latency], **options)
+
+        key = (connection_string, tuple(sorted(options.items())))
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = MongoClient(connection_string, event_listeners=[command_latency], **options)
+                _clients[key] = client
         return client
 
     except Exception as e:
         raise Exception(f"The following error occurred: {e}")
 
+def release_mongo_client(client):
+    """Hand a client back when a step is done; shared clients stay open until exit."""
+    with _clients_lock:
+        if any(shared is client for shared in _clients.values()):
+            return
+    client.close()
+
+def close_mongo_clients():
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+atexit.register(close_mongo_clients)
+
+def _forget_clients_after_fork():
+    """A forked worker must not reuse the parent's sockets; it opens its own clients on first use."""
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_clients_after_fork)
+
+def get_command_stats():
+    """Per-command counters recorded by every client created here."""
+    return command_latency.snapshot()
+
+def print_command_stats():
+    stats = get_command_stats()
+    if not stats:
+        print("No MongoDB commands recorded.")
+        return
+
+    print(f"{'command':<20}{'count':>8}{'failed':>8}{'total ms':>12}{'avg ms':>10}{'max ms':>10}")
+    for name, s in sorted(stats.items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"{name:<20}{s['count']:>8}{s['failed']:>8}{s['total_ms']:>12.1f}{s['total_ms'] / s['count']:>10.2f}{s['max_ms']:>10.1f}")
+
 def get_database(client, db_name="nfl_games_by_year"):
     try:
         database = client[db_name]
@@ -24,4 +148,3 @@ def get_database(client, db_name="nfl_games_by_year"):
 
     except Exception as e:
         raise Exception(f"Error accessing database: {e}")
-
@@ -0,0 +1,33 @@
+# modules/lazy_exports.py
+# Lazy package exports (PEP 562): a package lists which submodule each public name lives in, and the
+# submodule is only imported the first time one of its names is used.
+import sys
+import types
+import importlib
+
+class _LazyPackage(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it on the package; don't let that hide a function of the same
+        # name (e.g. functions.mongo_bleach), which is what `from package import name` should give
+        if isinstance(value, types.ModuleType) and name in self._lazy_exports:
+            return
+        super().__setattr__(name, value)
+
+def lazy_exports(package_name, exports):
+    """Set up `package_name` so every name in {submodule: [names]} is imported on first access."""
+    package = sys.modules[package_name]
+    package._lazy_exports = {name: submodule for submodule, names in exports.items() for name in names}
+    package.__class__ = _LazyPackage
+
+    def __getattr__(name):
+        submodule = package._lazy_exports.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f".{submodule}", package_name), name)
+        types.ModuleType.__setattr__(package, name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(package)) | set(package._lazy_exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,93 @@
+# modules/page_cache.py
+import os
+import json
+import time
+import hashlib
+from datetime import date
+from dotenv import load_dotenv
+from .season_store import atomic_write
+from .profiling import phase
+
+load_dotenv()
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "page_cache")
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 6 * 60 * 60))  # Seconds before an in-progress season is revalidated
+
+class PageCacheMiss(Exception):
+    """An offline run asked for a page that isn't in the cache; retrying can't help."""
+
+def season_is_final(year, today=None):
+    """A season is closed once the following March has started (the Super Bowl is in February)."""
+    today = today or date.today()
+    return today >= date(int(year) + 1, 3, 1)
+
+class PageCache:
+    """On-disk page cache: bodies stored by content hash, with a per-URL index entry holding validators."""
+
+    def __init__(self, cache_dir=PAGE_CACHE_DIR, ttl=PAGE_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _index_path(self, url):
+        return os.path.join(self.cache_dir, "index", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _body_path(self, content_hash):
+        return os.path.join(self.cache_dir, "objects", content_hash[:2], content_hash + ".html")
+
+    def get(self, url):
+        """Return the cache entry for a URL (with its 'html' loaded), or None."""
+        try:
+            with phase("file_io") as timing:
+                with open(self._index_path(url), 'r', encoding='utf-8') as f:
+                    index_text = f.read()
+                timing.add_bytes(len(index_text))
+            with phase("json_parse"):
+                entry = json.loads(index_text)
+            with phase("file_io") as timing:
+                with open(self._body_path(entry["sha256"]), 'r', encoding='utf-8') as f:
+                    entry["html"] = f.read()
+                timing.add_bytes(len(entry["html"]))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+        return entry
+
+    def is_fresh(self, entry, year=None):
+        """Closed seasons never expire; anything else is fresh for `ttl` seconds after it was last validated."""
+        if year is not None and season_is_final(year):
+            return True
+        return time.time() - entry.get("validated_at", 0) < self.ttl
+
+    def put(self, url, html, etag=None, last_modified=None):
+        content_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        body_path = self._body_path(content_hash)
+        if not os.path.exists(body_path):
+            with phase("file_io") as timing:
+                atomic_write(body_path, lambda f: f.write(html))
+                timing.add_bytes(len(html))
+
+        now = time.time()
+        entry = {
+            "url": url,
+            "sha256": content_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "validated_at": now,
+        }
+        atomic_write(self._index_path(url), lambda f: json.dump(entry, f))
+        return entry
+
+    def touch(self, url, entry):
+        """Record a successful revalidation (HTTP 304) without rewriting the body."""
+        entry = {key: value for key, value in entry.items() if key != "html"}
+        entry["validated_at"] = time.time()
+        atomic_write(self._index_path(url), lambda f: json.dump(entry, f))
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -0,0 +1,96 @@
+# modules/profiling.py
+# Run-level timing by phase (fetch, parse, JSON, file I/O, DB read/write, sleep...), switched on with main.py --profile.
+# When profiling is off, phase() only checks a flag, so the instrumentation can stay in place.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# parse is HTML parsing; json_parse/json_encode are season files and cache entries, kept apart from their disk reads/writes (file_io)
+PHASES = ("driver_start", "fetch", "sleep", "parse", "json_parse", "json_encode", "file_io", "db_read", "db_write")
+
+# MongoDB commands counted as db_write; every other command is a db_read
+DB_WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify", "createIndexes", "drop", "dropIndexes"}
+
+_enabled = False
+_trace = None  # List of Chrome trace events when a JSON trace was asked for
+_lock = threading.Lock()
+_stats = {}
+_started_at = None
+
+class _Phase:
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+    def add_bytes(self, count):
+        self.bytes += count
+
+def enable_profiling(trace=False):
+    """Start recording phases for this run; with trace=True every phase is also kept as a trace event."""
+    global _enabled, _trace, _started_at
+    with _lock:
+        _enabled = True
+        _trace = [] if trace else None
+        _stats.clear()
+        _started_at = time.perf_counter()
+
+def profiling_enabled():
+    return _enabled
+
+def record(name, seconds, nbytes=0, started=None):
+    """Add one finished phase; used directly where the duration is already known (e.g. MongoDB events)."""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _stats.setdefault(name, {"count": 0, "seconds": 0.0, "bytes": 0})
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["bytes"] += nbytes
+        if _trace is not None:
+            start = started if started is not None else time.perf_counter() - seconds
+            _trace.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                "ts": round((start - _started_at) * 1e6), "dur": round(seconds * 1e6), "args": {"bytes": nbytes},
+            })
+
+@contextmanager
+def phase(name):
+    """Time a block under a phase name. The yielded object takes add_bytes(n) for the bytes it moved."""
+    if not _enabled:
+        yield _Phase()
+        return
+    current = _Phase()
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        record(name, time.perf_counter() - start, current.bytes, start)
+
+def get_profile():
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+def print_profile():
+    """Summary table: wall time, calls and bytes per phase. Phases can overlap when work runs in threads."""
+    stats = get_profile()
+    wall = time.perf_counter() - _started_at if _started_at else 0.0
+    # Fixed phases first, then anything else (e.g. pipeline stages) in the order it was first seen
+    ordered = [name for name in PHASES if name in stats] + [name for name in stats if name not in PHASES]
+    width = max([14] + [len(name) + 2 for name in ordered])
+    print(f"\n{'phase':<{width}}{'calls':>8}{'seconds':>10}{'% wall':>8}{'MB':>10}")
+    for name in ordered:
+        s = stats[name]
+        share = 100 * s["seconds"] / wall if wall else 0.0
+        print(f"{name:<{width}}{s['count']:>8}{s['seconds']:>10.3f}{share:>7.1f}%{s['bytes'] / 1e6:>10.2f}")
+    print(f"{'wall':<{width}}{'':>8}{wall:>10.3f}")
+
+def write_trace(path):
+    """Write the recorded phases as a Chrome trace (open in chrome://tracing or Perfetto)."""
+    with _lock:
+        events = list(_trace or [])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"Wrote profile trace to {path}")
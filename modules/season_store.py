@@ -0,0 +1,146 @@
+# modules/season_store.py
+import os
+import json
+import tempfile
+from dotenv import load_dotenv
+from .profiling import phase
+
+load_dotenv()
+
+GAMES_DIR = "games_by_year_data"
+FORMATS = ("json", "jsonl")
+
+def default_format():
+    """Season file format to write: SEASON_FILE_FORMAT env var, 'json' or 'jsonl'."""
+    fmt = os.getenv("SEASON_FILE_FORMAT", "json").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported SEASON_FILE_FORMAT '{fmt}', expected one of {FORMATS}.")
+    return fmt
+
+def default_indent():
+    """Indentation for .json season files: SEASON_FILE_INDENT env var, compact when unset."""
+    indent = os.getenv("SEASON_FILE_INDENT")
+    return int(indent) if indent else None
+
+def season_path(season, fmt=None, games_dir=GAMES_DIR):
+    return os.path.join(games_dir, f"games_in_{season}.{fmt or default_format()}")
+
+def find_season_file(season, games_dir=GAMES_DIR):
+    """Return the existing file for a season, preferring the configured format, or None."""
+    preferred = default_format()
+    for fmt in (preferred,) + tuple(f for f in FORMATS if f != preferred):
+        path = season_path(season, fmt, games_dir)
+        if os.path.exists(path):
+            return path
+    return None
+
+def season_exists(season, games_dir=GAMES_DIR):
+    return find_season_file(season, games_dir) is not None
+
+def list_seasons(games_dir=GAMES_DIR):
+    """Seasons that have a games_in_{season} file, in sorted order."""
+    if not os.path.isdir(games_dir):
+        return []
+    seasons = set()
+    for filename in os.listdir(games_dir):
+        name, ext = os.path.splitext(filename)
+        if name.startswith("games_in_") and ext.lstrip(".") in FORMATS:
+            seasons.add(name[len("games_in_"):])
+    return sorted(seasons)
+
+def iter_season(season, games_dir=GAMES_DIR):
+    """Yield a season's games; JSON Lines files are streamed one game at a time."""
+    path = find_season_file(season, games_dir)
+    if path is None:
+        raise FileNotFoundError(season_path(season, games_dir=games_dir))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+def parse_season(text, path):
+    """A season file's games from its text, JSON or JSON Lines depending on the path."""
+    if path.endswith(".jsonl"):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return json.loads(text)
+
+def load_season(season, games_dir=GAMES_DIR):
+    """Load a season's games as a list. Raises FileNotFoundError if there is no file."""
+    path = find_season_file(season, games_dir)
+    if path is None:
+        raise FileNotFoundError(season_path(season, games_dir=games_dir))
+
+    with phase("file_io") as timing:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        timing.add_bytes(os.path.getsize(path))
+    with phase("json_parse") as timing:
+        games = parse_season(text, path)
+        timing.add_bytes(len(text))
+    return games
+
+def atomic_write(path, write):
+    """Write a file through a temp file in the same directory, then rename it into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def save_season(games, season, games_dir=GAMES_DIR, fmt=None, indent=None):
+    """Atomically replace a season file (write to a temp file, then rename over the original)."""
+    fmt = fmt or default_format()
+    indent = indent if indent is not None else default_indent()
+    path = season_path(season, fmt, games_dir)
+
+    with phase("json_encode") as timing:
+        if fmt == "jsonl":
+            text = "".join(json.dumps(game, separators=(",", ":")) + "\n" for game in games)
+        elif indent:
+            text = json.dumps(games, indent=indent)
+        else:
+            text = json.dumps(games, separators=(",", ":"))
+        timing.add_bytes(len(text))
+
+    with phase("file_io") as timing:
+        atomic_write(path, lambda f: f.write(text))
+        timing.add_bytes(os.path.getsize(path))
+
+    # Don't leave the other format behind with stale data
+    for other in FORMATS:
+        other_path = season_path(season, other, games_dir)
+        if other != fmt and os.path.exists(other_path):
+            os.remove(other_path)
+    return path
+
+def append_season(games, season, games_dir=GAMES_DIR):
+    """Append games to a season's JSON Lines file without loading what is already there."""
+    path = season_path(season, "jsonl", games_dir)
+    legacy_path = season_path(season, "json", games_dir)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        # Convert once so appends never need to re-read the whole list
+        save_season(load_season(season, games_dir), season, games_dir, fmt="jsonl")
+
+    with phase("json_encode") as timing:
+        text = "".join(json.dumps(game, separators=(",", ":")) + "\n" for game in games)
+        timing.add_bytes(len(text))
+
+    os.makedirs(games_dir, exist_ok=True)
+    with phase("file_io") as timing, open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+        timing.add_bytes(len(text))
+    return path
@@ -1,6 +1,6 @@
 from invoke import task
 from pymongo import MongoClient
-from modules import get_database, get_mongo_client
+from modules import get_database, get_mongo_client, release_mongo_client
 from functions.mongo_data_scrubber import mongo_data_scrubber
 
 def parse_years(years_arg):
@@ -26,7 +26,7 @@ def mongo_scrub(c, teams="all", years="all"):
     if years != "all":
         years = parse_years(years)
     mongo_data_scrubber(db, years, teams)
-    client.close()
+    release_mongo_client(client)
 
 @task
 def check(ctx, team='all', years='all'):
@@ -0,0 +1,88 @@
+# tests/test_async_scrub.py
+# Async mode against mongomock: same documents as the sync path, and never more than `concurrency` collections in flight.
+import copy
+import importlib
+import threading
+import time
+import pytest
+from functions.async_scrub import run_over_collections, normalize_week_fields_async
+from functions.normalize_week_fields import normalize_collection_weeks
+
+mongomock = pytest.importorskip("mongomock")
+
+TEAMS = ["Buffalo_Bills", "New_York_Jets", "Miami_Dolphins", "New_England_Patriots", "Dallas_Cowboys", "New_York_Giants"]
+
+def season_documents(team):
+    weeks = [1, "2", "Week 3", None, 4, "Wild Card"]
+    return [
+        {"parameters": {"season": str(season), "team": team},
+         "games": [{"game": {"id": season * 100 + i, "week": week}} for i, week in enumerate(weeks)]}
+        for season in (2021, 2022, 2023)
+    ]
+
+def make_client():
+    client = mongomock.MongoClient()
+    db = client["nfl_games_by_year"]
+    for team in TEAMS:
+        db[team].insert_many(copy.deepcopy(season_documents(team)))
+    return client
+
+def snapshot(db):
+    # The modified-at stamp is the write time, so it differs between two runs by design
+    return {name: list(db[name].find({}, {"_id": 0, "parameters.updated_at": 0})) for name in sorted(db.list_collection_names())}
+
+@pytest.fixture
+def patch_clients(monkeypatch):
+    """Point the sync and async paths at their own mongomock clients."""
+    def patch(client):
+        for module_name in ("modules.connection_module", "functions.normalize_week_fields"):
+            monkeypatch.setattr(importlib.import_module(module_name), "get_mongo_client", lambda: client)
+    return patch
+
+def test_async_normalize_matches_sync_documents(patch_clients):
+    sync_client, async_client = make_client(), make_client()
+    normalize_week_fields = importlib.import_module("functions.normalize_week_fields").normalize_week_fields
+
+    patch_clients(sync_client)
+    normalize_week_fields()
+    patch_clients(async_client)
+    results = normalize_week_fields_async(concurrency=4, server_side=False)
+
+    expected = snapshot(sync_client["nfl_games_by_year"])
+    assert snapshot(async_client["nfl_games_by_year"]) == expected
+    assert set(results) == set(TEAMS)
+    weeks = [game["game"]["week"] for document in expected["Buffalo_Bills"] for game in document["games"]]
+    assert weeks[:6] == ["Week 1", "Week 2", "Week 3", None, "Week 4", "Wild Card"]
+
+def test_async_dry_run_counts_match_sync(patch_clients):
+    client = make_client()
+    patch_clients(client)
+    db = client["nfl_games_by_year"]
+    before = snapshot(db)
+
+    counts = normalize_week_fields_async(concurrency=3, dry_run=True)
+
+    assert counts == {name: normalize_collection_weeks(db[name], dry_run=True) for name in TEAMS}
+    assert counts["Buffalo_Bills"] == 9  # 1, "2" and 4 in each of three seasons
+    assert snapshot(db) == before
+
+@pytest.mark.parametrize("concurrency", [1, 2, 4])
+def test_run_over_collections_bounds_in_flight_collections(concurrency):
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def work(name):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return name.upper()
+
+    names = [f"team_{i}" for i in range(10)]
+    results = run_over_collections(names, work, concurrency)
+
+    assert results == {name: name.upper() for name in names}
+    assert peak == concurrency
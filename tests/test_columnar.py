@@ -0,0 +1,47 @@
+# tests/test_columnar.py
+import copy
+import pytest
+from functions.assign_team_ids_and_update_json import assign_team_ids
+from functions.columnar import assign_team_ids_columnar
+
+pytest.importorskip("pandas")
+
+TEAMS = {"Buffalo Bills": 20, "New York Jets": 21, "Dallas Cowboys": 8}
+
+def preseason(home, visitor, points, points_opp):
+    return {"stage": "Pre Season", "home_team": home, "visitor_team": visitor, "points": points, "points_opp": points_opp}
+
+SEASONS = {
+    "2023": [
+        preseason("Buffalo Bills", "New York Jets", "17", "20"),
+        preseason("Dallas Cowboys", "Buffalo Bills", None, "10"),  # Null score
+        preseason("New York Jets", "Dallas Cowboys", "", "3"),
+        {"stage": "Pre Season", "home_team": "Dallas Cowboys", "visitor_team": "New York Jets", "points_opp": "7"},  # No score at all
+        preseason("Buffalo Bills", "Las Vegas Raiders", "13", "9"),  # Unknown team
+        {"stage": "Regular Season", "home_team": "New York Jets", "visitor_team": "Buffalo Bills",
+         "winner": "New York Jets", "loser": "Buffalo Bills", "points": None, "points_opp": None},
+    ],
+    "2022": [preseason("New York Jets", "Buffalo Bills", "24", "24")],
+}
+
+def run_python(seasons):
+    for season, games_data in seasons.items():
+        assign_team_ids(games_data, season, TEAMS)
+
+def test_engines_agree_on_missing_scores_and_ids(capsys):
+    python_seasons, columnar_seasons = copy.deepcopy(SEASONS), copy.deepcopy(SEASONS)
+
+    run_python(python_seasons)
+    python_log = capsys.readouterr().out
+    assign_team_ids_columnar(columnar_seasons, TEAMS)
+    columnar_log = capsys.readouterr().out
+
+    assert columnar_seasons == python_seasons
+    assert columnar_log == python_log
+    assert python_log.count("Skipping game due to invalid points format") == 3
+
+    skipped = python_seasons["2023"][1]
+    assert "winner" not in skipped and "winner_id" not in skipped
+    assert skipped["home_team_id"] == 8 and skipped["visitor_team_id"] == 20
+    unknown = python_seasons["2023"][4]
+    assert (unknown["winner"], unknown["winner_id"], unknown["loser_id"]) == ("Las Vegas Raiders", None, 20)
@@ -0,0 +1,49 @@
+# tests/test_game_utils.py
+from functions.game_utils import merge_games
+
+def regular_game(winner, loser, pts_win, pts_lose):
+    return {
+        "stage": "Regular Season", "week_num": "1", "game_date": "2023-09-10",
+        "winner": winner, "loser": loser, "pts_win": pts_win, "pts_lose": pts_lose,
+    }
+
+def test_merge_drops_derived_ids_when_the_winner_flips():
+    stored = regular_game("Buffalo Bills", "New York Jets", "22", "16")
+    stored.update(season="2023", winner_id=20, loser_id=21, game_id=7001, fingerprint="abc", home_team_id=21)
+    existing = [stored]
+
+    # Score correction: the Jets actually won
+    added, updated = merge_games(existing, [regular_game("New York Jets", "Buffalo Bills", "22", "16")], season="2023")
+
+    assert (added, updated) == (0, 1)
+    game = existing[0]
+    assert game["winner"] == "New York Jets" and game["loser"] == "Buffalo Bills"
+    for field in ("winner_id", "loser_id", "game_id", "fingerprint"):
+        assert field not in game
+    assert game["home_team_id"] == 21  # Not derived from the result, so kept
+
+def test_merge_drops_preseason_winner_computed_from_old_score():
+    stored = {
+        "stage": "Pre Season", "week_num": "1", "game_date": "2023-08-10", "visitor_team": "Dallas Cowboys",
+        "home_team": "Buffalo Bills", "points": "17", "points_opp": "20",
+        "winner": "Buffalo Bills", "winner_id": 20, "loser": "Dallas Cowboys", "loser_id": 8, "game_id": 6001,
+    }
+    existing = [stored]
+    rescraped = {key: stored[key] for key in ("stage", "week_num", "game_date", "visitor_team", "home_team", "points_opp")}
+    rescraped["points"] = "24"
+
+    merge_games(existing, [rescraped], season="2023")
+
+    for field in ("winner", "loser", "winner_id", "loser_id", "game_id"):
+        assert field not in existing[0]
+
+def test_merge_keeps_derived_ids_when_the_result_is_unchanged():
+    stored = regular_game("Buffalo Bills", "New York Jets", "22", "16")
+    stored.update(winner_id=20, loser_id=21, game_id=7001, fingerprint="abc", gametime="1:00PM")
+    existing = [stored]
+    rescraped = regular_game("Buffalo Bills", "New York Jets", "22", "16")
+    rescraped["gametime"] = "4:25PM"
+
+    assert merge_games(existing, [rescraped], season="2023") == (0, 1)
+    assert existing[0]["gametime"] == "4:25PM"
+    assert (existing[0]["winner_id"], existing[0]["game_id"], existing[0]["fingerprint"]) == (20, 7001, "abc")
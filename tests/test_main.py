@@ -0,0 +1,12 @@
+# tests/test_main.py
+# Spawn-mode worker processes (season_workers) re-import main.py as __mp_main__; the CLI must not run there.
+import os
+import runpy
+import sys
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+def test_spawned_worker_import_does_not_run_cli(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["main.py"])  # No action: argparse would exit if the CLI ran
+    namespace = runpy.run_path(MAIN, run_name="__mp_main__")
+    assert "main" in namespace
@@ -0,0 +1,162 @@
+# tests/test_web_scraper.py
+# Fetch backends and table parsers against saved pro-football-reference pages; no network or browser needed.
+import os
+from contextlib import contextmanager
+import pytest
+import requests
+from bs4 import BeautifulSoup
+from functions import web_scraper
+from modules.page_cache import PageCache, PageCacheMiss
+from functions.web_scraper import (
+    RateLimiter, download_data_for_year, fetch_soup, parse_preseason_data, parse_regular_season_data, REGULAR_SEASON_URL, PRESEASON_URL
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+class FakeResponse:
+    def __init__(self, text, status_code=200, headers=None):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+class FakeSession:
+    """Stands in for the shared requests session; hands back a canned response (or raises one)."""
+
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.urls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.urls.append(url)
+        if self.error:
+            raise self.error
+        return self.response
+
+class FakeDriver:
+    def __init__(self, html):
+        self.page_source = html
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+
+class FakePool:
+    """DriverPool stand-in that records whether Selenium was needed."""
+
+    def __init__(self, html=None):
+        self.fake_driver = FakeDriver(html)
+        self.used = False
+
+    @contextmanager
+    def driver(self):
+        self.used = True
+        yield self.fake_driver
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(web_scraper, "_session", fake)
+    return fake
+
+@pytest.fixture
+def rate_limiter():
+    return RateLimiter(interval=0)
+
+def test_http_backend_parses_served_table(session, rate_limiter):
+    session.response = FakeResponse(load_fixture("games.htm"))
+    pool = FakePool()
+    url = REGULAR_SEASON_URL.format(2023)
+
+    soup = fetch_soup(url, "regular season", "http", pool, rate_limiter, 2023)
+
+    assert session.urls == [url]
+    assert not pool.used
+    assert len(parse_regular_season_data(soup)) == 285
+
+def test_http_backend_falls_back_to_selenium_when_table_missing(session, rate_limiter):
+    session.response = FakeResponse("<html><body><div id='content'>Loading...</div></body></html>")
+    pool = FakePool(load_fixture("preseason.htm"))
+    url = PRESEASON_URL.format(2023)
+
+    soup = fetch_soup(url, "preseason", "http", pool, rate_limiter, 2023)
+
+    assert pool.used
+    assert pool.fake_driver.urls == [url]
+    assert len(parse_preseason_data(soup, 2023)) == 49
+
+def test_http_backend_falls_back_to_selenium_on_request_error(session, rate_limiter):
+    session.error = requests.ConnectionError("connection refused")
+    pool = FakePool(load_fixture("games.htm"))
+
+    soup = fetch_soup(REGULAR_SEASON_URL.format(2023), "regular season", "http", pool, rate_limiter, 2023)
+
+    assert pool.used
+    assert len(parse_regular_season_data(soup)) == 285
+
+def test_selenium_backend_never_uses_http(session, rate_limiter):
+    pool = FakePool(load_fixture("games.htm"))
+
+    fetch_soup(REGULAR_SEASON_URL.format(2023), "regular season", "selenium", pool, rate_limiter, 2023)
+
+    assert session.urls == []
+    assert pool.used
+
+@pytest.mark.parametrize("fixture, parse", [
+    ("games.htm", parse_regular_season_data),
+    ("preseason.htm", lambda soup: parse_preseason_data(soup, 2023)),
+    ("preseason.htm", lambda soup: parse_preseason_data(soup, 2012)),  # Older seasons renumber the weeks
+])
+def test_lxml_and_html_parser_give_identical_rows(fixture, parse):
+    html = load_fixture(fixture)
+    assert parse(BeautifulSoup(html, "lxml")) == parse(BeautifulSoup(html, "html.parser"))
+
+def test_regular_season_rows_skip_header_rows_and_rename_playoff_weeks():
+    games = parse_regular_season_data(BeautifulSoup(load_fixture("games.htm"), "lxml"))
+
+    assert games[0] == {
+        "stage": "Regular Season", "week_num": "1", "game_day_of_week": "Thu", "game_date": "2023-09-07", "gametime": "8:20PM",
+        "winner": "Miami Dolphins", "loser": "Seattle Seahawks", "pts_win": "30", "pts_lose": "17", "yards_win": "475", "yards_lose": "242",
+    }
+    assert all(game["week_num"] != "Week" for game in games)
+    assert [game["week_num"] for game in games if game["stage"] == "Post Season"][-1] == "Super Bowl"
+    assert sum(game["stage"] == "Post Season" for game in games) == 13
+
+def test_preseason_rows_label_hall_of_fame_game():
+    games = parse_preseason_data(BeautifulSoup(load_fixture("preseason.htm"), "lxml"), 2023)
+
+    assert games[0]["week_num"] == "Hall of Fame Game"
+    assert games[0]["game_date"] == "2023-08-06"
+    assert {game["week_num"] for game in games[1:]} == {"1", "2", "3"}
+
+def test_offline_cache_miss_raises_page_cache_miss(session, rate_limiter, tmp_path):
+    pool = FakePool()
+
+    with pytest.raises(PageCacheMiss):
+        fetch_soup(REGULAR_SEASON_URL.format(2023), "regular season", "http", pool, rate_limiter, 2023, PageCache(str(tmp_path)), offline=True)
+    assert session.urls == [] and not pool.used
+
+def test_parse_errors_are_retried_not_treated_as_cache_misses(monkeypatch, tmp_path):
+    monkeypatch.setattr(web_scraper, "RETRY_DELAY", 0)
+    monkeypatch.setattr(web_scraper, "season_path", lambda year: str(tmp_path / f"games_in_{year}.json"))
+    calls = []
+
+    def broken_parse(soup):
+        calls.append(soup)
+        raise KeyError("week_num")
+
+    with pytest.raises(KeyError):
+        download_data_for_year(
+            2023, "regular season", REGULAR_SEASON_URL, broken_parse, pool=FakePool(load_fixture("games.htm")),
+            rate_limiter=RateLimiter(interval=0), max_retries=2
+        )
+    assert len(calls) == 3